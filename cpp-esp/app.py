@@ -1,6 +1,6 @@
 # EcoWatt Cloud API (Flask Example) — 15s inactivity debounce (per device)
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import struct
 import datetime
@@ -11,6 +11,7 @@ import hashlib
 import base64
 import json
 import os
+import zlib
 from pathlib import Path
 
 app = Flask(__name__)
@@ -103,7 +104,8 @@ COMMAND_HISTORY = []   # Full history of commands
 
 # -------- FOTA Management --------
 FIRMWARE_MANIFEST = None
-FIRMWARE_CHUNKS = {}   # chunk_number -> {data, mac}
+FIRMWARE_CHUNKS = {}   # chunk_number -> pre-encoded JSON body {chunk_number, data, mac, size}
+FIRMWARE_RAW_CHUNKS = {}  # chunk_number -> (raw chunk bytes, hex mac) for ?format=raw requests
 FOTA_STATUS = {}       # device_id -> {chunk_received, verified, last_update}
 
 # -------- Security --------
@@ -198,6 +200,17 @@ def create_secured_response(payload_dict, device_id=None):
         'mac': mac
     }
 
+def _mac_matches(expected_raw, received_mac):
+    """Constant-time MAC check; header may be 64 hex chars or unpadded base64."""
+    try:
+        if len(received_mac) == 64:
+            received_raw = bytes.fromhex(received_mac)
+        else:
+            received_raw = base64.b64decode(received_mac + '=' * (-len(received_mac) % 4), validate=True)
+    except ValueError:
+        return False
+    return hmac.compare_digest(expected_raw, received_raw)
+
 def verify_request_security(device_id):
     """
     Verify security headers (X-Nonce, X-Timestamp, X-MAC) for GET requests.
@@ -242,9 +255,9 @@ def verify_request_security(device_id):
     
     # Verify HMAC: endpoint + nonce + timestamp
     hmac_input = request.path + nonce + timestamp
-    calculated_mac = hmac.new(PSK, hmac_input.encode(), hashlib.sha256).hexdigest()
+    calculated_mac = hmac.digest(PSK, hmac_input.encode(), 'sha256')
     
-    if not hmac.compare_digest(calculated_mac, received_mac):
+    if not _mac_matches(calculated_mac, received_mac):
         msg = f"HMAC verification failed"
         log_security_event(device_id, 'hmac_failed', msg)
         return False, msg
@@ -257,6 +270,7 @@ def verify_request_security(device_id):
 # -------- Logging --------
 SECURITY_LOGS = []  # Security events (HMAC failures, replay attacks, etc.)
 FOTA_LOGS = []      # FOTA operations (upload, download, verify, rollback)
+FOTA_LOGS_CHANGED = threading.Condition()  # Wakes /api/cloud/fota/events streams on new entries
 COMMAND_LOGS = []   # Command forwarding to Modbus (detailed)
 
 # -------- Debounced batching state (per device) --------
@@ -1071,30 +1085,79 @@ def get_command_history():
 def upload_firmware():
     """
     Cloud admin endpoint to upload firmware for OTA.
-    Request: {version, size, hash, chunk_size, firmware_data (base64)}
+    Request (JSON): {version, size, hash, chunk_size, firmware_data (base64)}
+    Request (multipart/form-data): fields version, size, hash, chunk_size,
+        skip_validation plus a raw 'firmware' file part (no base64)
+    Request (application/octet-stream): the same fields as query parameters,
+        body is the raw firmware image (lets clients stream it from disk)
+    The JSON form is kept for older clients only; the binary forms skip the
+    base64 inflation and decode, which cost far more than the JSON parse.
+    Any form may add compression=zlib: the image is then zlib-compressed on
+    the wire, while size and hash still describe the uncompressed firmware.
     """
-    req = request.get_json(force=True)
-    
-    version = req.get('version')
-    size = req.get('size')
-    fw_hash = req.get('hash')
-    chunk_size = req.get('chunk_size', 1024)
-    firmware_data_b64 = req.get('firmware_data')
-    
-    if not all([version, size, fw_hash, firmware_data_b64]):
-        log_fota_event('cloud', 'upload_failed', 'Missing required fields')
-        return jsonify({'error': 'Missing required fields'}), 400
+    if request.mimetype == 'application/octet-stream':
+        # Streamed raw upload: metadata arrives in the query string
+        req = request.args
+        version = req.get('version')
+        size = req.get('size', type=int)
+        fw_hash = req.get('hash')
+        chunk_size = req.get('chunk_size', 1024, type=int)
+        skip_validation = req.get('skip_validation', '').lower() in ('1', 'true', 'yes')
+        firmware_data = request.get_data()
+        
+        if not all([version, size, fw_hash, firmware_data]):
+            log_fota_event('cloud', 'upload_failed', 'Missing required fields')
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        log_fota_event('cloud', 'firmware_received', f'Size: {len(firmware_data)} bytes (raw stream)')
+    elif request.files:
+        # Raw binary upload: metadata arrives as form fields
+        req = request.form
+        firmware_file = request.files.get('firmware')
+        version = req.get('version')
+        size = req.get('size', type=int)
+        fw_hash = req.get('hash')
+        chunk_size = req.get('chunk_size', 1024, type=int)
+        skip_validation = req.get('skip_validation', '').lower() in ('1', 'true', 'yes')
+        
+        if not all([version, size, fw_hash, firmware_file]):
+            log_fota_event('cloud', 'upload_failed', 'Missing required fields')
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        firmware_data = firmware_file.read()
+        log_fota_event('cloud', 'firmware_received', f'Size: {len(firmware_data)} bytes (multipart)')
+    else:
+        req = request.get_json(force=True)
+        
+        version = req.get('version')
+        size = req.get('size')
+        fw_hash = req.get('hash')
+        chunk_size = req.get('chunk_size', 1024)
+        firmware_data_b64 = req.get('firmware_data')
+        skip_validation = req.get('skip_validation', False)
+        
+        if not all([version, size, fw_hash, firmware_data_b64]):
+            log_fota_event('cloud', 'upload_failed', 'Missing required fields')
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        # Decode firmware data
+        try:
+            firmware_data = base64.b64decode(firmware_data_b64)
+            log_fota_event('cloud', 'firmware_decoded', f'Size: {len(firmware_data)} bytes')
+        except Exception as e:
+            log_fota_event('cloud', 'upload_failed', f'Invalid base64: {e}')
+            return jsonify({'error': f'Invalid base64: {e}'}), 400
     
-    # Decode firmware data
-    try:
-        firmware_data = base64.b64decode(firmware_data_b64)
-        log_fota_event('cloud', 'firmware_decoded', f'Size: {len(firmware_data)} bytes')
-    except Exception as e:
-        log_fota_event('cloud', 'upload_failed', f'Invalid base64: {e}')
-        return jsonify({'error': f'Invalid base64: {e}'}), 400
+    # Undo optional transfer compression before checking the image
+    if req.get('compression') == 'zlib':
+        try:
+            firmware_data = zlib.decompress(firmware_data)
+        except zlib.error as e:
+            log_fota_event('cloud', 'upload_failed', f'Invalid zlib data: {e}')
+            return jsonify({'error': f'Invalid zlib data: {e}'}), 400
+        log_fota_event('cloud', 'firmware_decompressed', f'Size: {len(firmware_data)} bytes')
     
     # Verify hash (skip if testing corrupted firmware for rollback demo)
-    skip_validation = req.get('skip_validation', False)
     calculated_hash = hashlib.sha256(firmware_data).hexdigest()
     if calculated_hash != fw_hash and not skip_validation:
         log_fota_event('cloud', 'upload_failed', f'Hash mismatch: expected {fw_hash}, got {calculated_hash}')
@@ -1117,25 +1180,26 @@ def upload_firmware():
     
     # Split into chunks
     FIRMWARE_CHUNKS.clear()
+    FIRMWARE_RAW_CHUNKS.clear()
     num_chunks = (len(firmware_data) + chunk_size - 1) // chunk_size
     
     log_fota_event('cloud', 'chunking_started', f'Creating {num_chunks} chunks of {chunk_size} bytes')
     
+    # Slice a view of the image so each chunk is hashed/encoded without copying it out first
+    firmware_view = memoryview(firmware_data)
     for i in range(num_chunks):
         start = i * chunk_size
         end = min(start + chunk_size, len(firmware_data))
-        chunk_data = firmware_data[start:end]
-        chunk_b64 = base64.b64encode(chunk_data).decode('ascii')
+        chunk_data = firmware_view[start:end]
         
         # Generate HMAC for chunk
         mac = hmac.new(PRE_SHARED_KEY, chunk_data, hashlib.sha256).hexdigest()
         
-        FIRMWARE_CHUNKS[i] = {
-            'chunk_number': i,
-            'data': chunk_b64,
-            'mac': mac,
-            'size': len(chunk_data)
-        }
+        # Encode the response once here; the base64 bytes go in as-is (no str round trip)
+        # and every device request for this chunk is served without re-serializing it
+        FIRMWARE_CHUNKS[i] = b'{"chunk_number":%d,"data":"%s","mac":"%s","size":%d}\n' % (
+            i, base64.b64encode(chunk_data), mac.encode('ascii'), len(chunk_data))
+        FIRMWARE_RAW_CHUNKS[i] = (chunk_data.tobytes(), mac)
     
     log_fota_event('cloud', 'firmware_uploaded', 
                   f'Version: {version}, Size: {size} bytes, Chunks: {num_chunks}, Hash: {fw_hash}')
@@ -1166,6 +1230,7 @@ def clear_fota_manifest():
     global FIRMWARE_MANIFEST
     FIRMWARE_MANIFEST = None
     FIRMWARE_CHUNKS.clear()
+    FIRMWARE_RAW_CHUNKS.clear()
     print("[FOTA] Manifest and chunks cleared")
     return jsonify({'status': 'success', 'message': 'FOTA manifest cleared'})
 
@@ -1173,13 +1238,22 @@ def clear_fota_manifest():
 def get_fota_chunk():
     """
     Device requests specific firmware chunk.
-    Query: chunk_number
+    Query: chunk_number, format (optional: 'raw' returns the bytes as
+    application/octet-stream with the MAC in X-Chunk-MAC, skipping base64)
     """
     chunk_num = int(request.args.get('chunk_number', 0))
     
+    if request.args.get('format') == 'raw':
+        raw = FIRMWARE_RAW_CHUNKS.get(chunk_num)
+        if raw:
+            data, mac = raw
+            return app.response_class(data, mimetype='application/octet-stream',
+                                      headers={'X-Chunk-Number': str(chunk_num), 'X-Chunk-MAC': mac})
+        return jsonify({'error': 'Chunk not found'}), 404
+    
     chunk = FIRMWARE_CHUNKS.get(chunk_num)
     if chunk:
-        return jsonify(chunk)
+        return app.response_class(chunk, mimetype='application/json')
     
     return jsonify({'error': 'Chunk not found'}), 404
 
@@ -1248,6 +1322,35 @@ def get_fota_status():
         'device_status': FOTA_STATUS
     })
 
+FOTA_EVENTS_KEEPALIVE_SEC = 10
+
+@app.route('/api/cloud/fota/events', methods=['GET'])
+def stream_fota_events():
+    """
+    Server-sent event stream of FOTA log entries as they are logged.
+    Query: device_id (optional filter)
+    Each event's data is one FOTA log entry as JSON; a comment line is sent
+    every FOTA_EVENTS_KEEPALIVE_SEC so clients can check their own deadlines.
+    """
+    device_id = request.args.get('device_id')
+    
+    def generate():
+        sent = len(FOTA_LOGS)
+        yield ': connected\n\n'
+        while True:
+            with FOTA_LOGS_CHANGED:
+                FOTA_LOGS_CHANGED.wait_for(lambda: len(FOTA_LOGS) > sent, timeout=FOTA_EVENTS_KEEPALIVE_SEC)
+                entries = FOTA_LOGS[sent:]
+            if not entries:
+                yield ': keep-alive\n\n'
+                continue
+            sent += len(entries)
+            for entry in entries:
+                if device_id is None or entry.get('device_id') == device_id:
+                    yield f"data: {json.dumps(entry)}\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 @app.route('/api/cloud/fota/rollback', methods=['POST'])
 def trigger_fota_rollback():
     """
@@ -1270,7 +1373,7 @@ def trigger_fota_rollback():
         'action': 'rollback_requested',
         'reason': reason
     }
-    FOTA_LOGS.append(log_entry)
+    _append_fota_log(log_entry)
     
     print(f"\n[FOTA ROLLBACK] Device: {device_id}")
     print(f"[FOTA ROLLBACK] Reason: {reason}")
@@ -1321,17 +1424,36 @@ def check_rollback_status():
 def get_security_logs():
     """
     Get security logs (HMAC failures, replay attacks, etc.)
+    Pass ?since=<cursor> from a previous response to get only newer events.
+    With a cursor, the oldest `limit` events are returned and the cursor only
+    advances past those, so paging forward never skips any.
     """
     device_id = request.args.get('device_id')
     limit = int(request.args.get('limit', 100))
+    since = request.args.get('since', type=int)
     
-    logs = SECURITY_LOGS
-    if device_id:
-        logs = [log for log in logs if log.get('device_id') == device_id]
+    end = len(SECURITY_LOGS)
+    if since is None:
+        logs = SECURITY_LOGS
+        if device_id:
+            logs = [log for log in logs if log.get('device_id') == device_id]
+        return jsonify({
+            'total': len(logs),
+            'logs': logs[-limit:],
+            'cursor': end
+        })
+    
+    # A cursor past the end means the logs were cleared - start over
+    start = since if since <= end else 0
+    matches = [i for i in range(start, end)
+               if not device_id or SECURITY_LOGS[i].get('device_id') == device_id]
+    page = matches[:limit]
     
     return jsonify({
-        'total': len(logs),
-        'logs': logs[-limit:]
+        'total': len(matches),
+        'logs': [SECURITY_LOGS[i] for i in page],
+        # Resume at the first event not returned, or past everything seen
+        'cursor': matches[limit] if len(matches) > limit else end
     })
 
 @app.route('/api/cloud/logs/fota', methods=['GET'])
@@ -1491,9 +1613,15 @@ def log_security_event(device_id, event_type, details):
     })
     print(f"[SECURITY] {device_id}: {event_type} - {details}")
 
+def _append_fota_log(entry):
+    """Record a FOTA log entry and wake any event-stream listeners."""
+    with FOTA_LOGS_CHANGED:
+        FOTA_LOGS.append(entry)
+        FOTA_LOGS_CHANGED.notify_all()
+
 def log_fota_event(device_id, event_type, details):
     """Log FOTA events."""
-    FOTA_LOGS.append({
+    _append_fota_log({
         'timestamp': datetime.datetime.now().isoformat(),
         'device_id': device_id,
         'event_type': event_type,
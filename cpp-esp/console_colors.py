@@ -0,0 +1,38 @@
+"""
+Console colour setup shared by the serial monitors
+Enables native ANSI handling on Windows (colorama as fallback) and
+defines the log-line colour prefixes once
+"""
+
+import os
+from colorama import init, Fore, Style
+
+def _enable_vt_mode():
+    """Let the Windows 10+ console interpret ANSI codes natively. Returns False if unsupported."""
+    if os.name != 'nt':
+        return True
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_ulong()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    except (AttributeError, OSError):
+        return False
+
+# Native ANSI avoids colorama re-parsing every write; older consoles fall back to it
+NATIVE_ANSI = _enable_vt_mode()
+if not NATIVE_ANSI:
+    init()
+
+# Colour prefixes built once instead of concatenated per line
+PFX_ERR = Fore.RED + Style.BRIGHT
+PFX_OK = Fore.GREEN + Style.BRIGHT
+PFX_WARN = Fore.YELLOW + Style.BRIGHT
+PFX_CFG = Fore.CYAN + Style.BRIGHT
+PFX_SEC = Fore.MAGENTA + Style.BRIGHT
+PFX_INFO = Fore.WHITE
+PFX_DIM = Style.DIM
+RESET = Style.RESET_ALL
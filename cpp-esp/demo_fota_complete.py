@@ -10,11 +10,12 @@ This script:
 
 import requests
 import json
-import hashlib
 import base64
 import time
 from pathlib import Path
 
+from fota_cache import load_firmware
+
 # Configuration
 SERVER_URL = "http://localhost:8080"
 FIRMWARE_VERSION = "1.0.4"
@@ -35,14 +36,12 @@ def upload_firmware():
     
     # Read firmware binary
     print(f"\n📦 Reading firmware from: {FIRMWARE_PATH}")
-    with open(firmware_file, 'rb') as f:
-        firmware_data = f.read()
+    firmware_data, fw_hash = load_firmware(FIRMWARE_PATH)
     
     file_size = len(firmware_data)
     print(f"   Firmware size: {file_size:,} bytes")
     
-    # Calculate SHA-256 hash
-    fw_hash = hashlib.sha256(firmware_data).hexdigest()
+    # SHA-256 hash comes from the load (cached per build)
     print(f"   SHA-256 hash: {fw_hash[:32]}...")
     
     # Encode as base64
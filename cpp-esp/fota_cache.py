@@ -0,0 +1,80 @@
+"""
+Shared firmware settings, loading and HTTP session setup for the FOTA scripts
+
+Reading and hashing the build output is cached in-process, keyed by
+(path, mtime, size), so uploading the same build again in one session doesn't
+redo the work and a rebuild is picked up. Only sha256_file's sidecar digest
+persists across runs.
+"""
+
+import functools
+import hashlib
+import json
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CLOUD_SERVER = "http://localhost:8080"
+FIRMWARE_PATH = ".pio/build/esp32dev/firmware.bin"
+
+# 8KB chunks - fits in ESP32 memory, faster than 4KB
+# 8KB binary = ~11KB base64 in JSON = should fit in ESP32 RAM
+UPLOAD_CHUNK_SIZE = 8192
+
+def make_session():
+    """Keep-alive session for one script's requests; transient gateway errors are retried."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=4,
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                          allowed_methods=frozenset({"GET", "POST"})),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Only the latest build is kept, so at most one image stays in memory
+@functools.lru_cache(maxsize=1)
+def _load_firmware(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+def load_firmware(path=FIRMWARE_PATH):
+    """(firmware bytes, SHA-256 hex) for path, re-read only when the file changes (raises OSError if missing)."""
+    st = os.stat(path)
+    return _load_firmware(path, st.st_mtime_ns, st.st_size)
+
+def sha256_file(path, block_size=65536):
+    """SHA-256 hex of a file, read block by block so the image is never held whole.
+
+    The digest is kept in a <path>.sha256cache sidecar and reused while the
+    file's mtime and size are unchanged, so re-uploading the same build skips hashing.
+    """
+    st = os.stat(path)
+    cache_path = path + ".sha256cache"
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return cached["sha256"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # Missing or stale cache - hash the file
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    try:
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Read-only build dir - just don't cache
+    return digest
@@ -18,10 +18,12 @@ import os
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+import fota_cache
+
 class FOTAUpdateManager:
     def __init__(self, server_url: str = "http://localhost:8080"):
         self.server_url = server_url
-        self.firmware_path = ".pio/build/esp32dev/firmware.bin"
+        self.firmware_path = fota_cache.FIRMWARE_PATH
         
     def calculate_hash(self, data: bytes) -> str:
         """Calculate SHA256 hash of firmware data"""
@@ -32,8 +34,7 @@ class FOTAUpdateManager:
         path = custom_path if custom_path else self.firmware_path
         
         try:
-            with open(path, 'rb') as f:
-                firmware_data = f.read()
+            firmware_data, _ = fota_cache.load_firmware(path)
             print(f"✅ Firmware loaded: {len(firmware_data)} bytes ({len(firmware_data)//1024}KB)")
             return firmware_data
         except FileNotFoundError:
@@ -8,14 +8,36 @@ import argparse
 import subprocess
 import time
 import json
+import os
 import sys
 from datetime import datetime
 from pathlib import Path
 
 class IntegrationTester:
-    def __init__(self, port="COM5", api_key=None):
+    # Checklist key -> (row number, feature name) for the report table
+    TEST_NAMES = {
+        "data_acquisition_buffering": (1, "Data Acquisition & Buffering"),
+        "secure_transmission": (2, "Secure Transmission (Upload)"),
+        "remote_configuration": (3, "Remote Configuration"),
+        "command_execution": (4, "Command Execution"),
+        "fota_success": (5, "FOTA Update (Success)"),
+        "fota_rollback": (6, "FOTA Update (Rollback)"),
+        "power_optimization": (7, "Power Optimization"),
+        "fault_network_error": (8, "Fault: Network Error"),
+        "fault_inverter_sim": (9, "Fault: Inverter SIM Errors"),
+    }
+    
+    # Keys checked together by one test; --assume-passed must name both or neither
+    ASSUME_PAIRS = (
+        ("fota_success", "fota_rollback"),
+        ("fault_network_error", "fault_inverter_sim"),
+    )
+
+    def __init__(self, port="COM5", api_key=None, assume_passed=(), non_interactive=False):
         self.port = port
         self.api_key = api_key
+        self.assume_passed = set(assume_passed)
+        self.non_interactive = non_interactive
         self.test_results = {}
         self.checklist = {
             "data_acquisition_buffering": {"tested": False, "passed": False, "notes": ""},
@@ -38,6 +60,35 @@ class IntegrationTester:
         print(f"\n[TEST] {test_name}")
         print("-" * 80)
         
+    def _input(self, prompt, default="skip"):
+        """Prompt the tester, or answer with default in non-interactive mode"""
+        if self.non_interactive:
+            print(f"{prompt}{default}")
+            return default
+        return input(prompt)
+    
+    def _manual_check(self, prompt):
+        """Ask a manual y/n(/skip) question. In non-interactive mode nothing is
+        asked and None is returned, so the checklist entry is left untouched."""
+        if self.non_interactive:
+            print(f"{prompt}⊘ NOT RUN (--non-interactive)")
+            return None
+        return input(prompt).strip().lower()
+    
+    def _record(self, key, tested, passed, notes):
+        self.checklist[key]["tested"] = tested
+        self.checklist[key]["passed"] = passed
+        self.checklist[key]["notes"] = notes
+    
+    def _assumed(self, *keys):
+        """Mark keys passed without prompting if all were given via --assume-passed"""
+        if not keys or not self.assume_passed.issuperset(keys):
+            return False
+        for key in keys:
+            self._record(key, tested=True, passed=True, notes="assumed-passed via CLI")
+        print("✓ ASSUMED PASSED (--assume-passed)")
+        return True
+    
     def run_command(self, cmd, description, timeout=30):
         """Run a command and return success status"""
         print(f"\n▶ {description}")
@@ -77,6 +128,9 @@ class IntegrationTester:
         """Test 1: Verify serial connection and device boot"""
         self.print_test("1. Serial Connection & Device Boot")
         
+        if self._assumed("data_acquisition_buffering"):
+            return True
+        
         print("\n📋 Manual Test Steps:")
         print("1. Open serial monitor: pio device monitor --baud 115200")
         print("2. Press EN button on ESP32 to reset")
@@ -86,7 +140,9 @@ class IntegrationTester:
         print("   - [EventLog] Event Logger initialized")
         print("   - [FaultHandler] Fault Handler initialized")
         
-        result = input("\n✓ Did you see all initialization messages? (y/n): ").strip().lower()
+        result = self._manual_check("\n✓ Did you see all initialization messages? (y/n): ")
+        if result is None:
+            return None
         
         if result == 'y':
             self.checklist["data_acquisition_buffering"]["tested"] = True
@@ -104,6 +160,9 @@ class IntegrationTester:
         """Test 2: Verify power management is working"""
         self.print_test("2. Power Management Verification")
         
+        if self._assumed("power_optimization"):
+            return True
+        
         print("\n📋 Power management was already tested in Part 1")
         print("Results from power_measurement_report.md:")
         print("  ✓ 87.5% power savings achieved")
@@ -115,7 +174,9 @@ class IntegrationTester:
         print("1. Check serial output for: [PowerMgr] Stats: Mode=...")
         print("2. Verify modes change between NORMAL and LOW_POWER")
         
-        result = input("\n✓ Is power management still working? (y/n): ").strip().lower()
+        result = self._manual_check("\n✓ Is power management still working? (y/n): ")
+        if result is None:
+            return None
         
         if result == 'y':
             print("✓ PASSED - Power management verified")
@@ -128,6 +189,9 @@ class IntegrationTester:
         """Test 3: Data acquisition and buffering"""
         self.print_test("3. Data Acquisition & Buffering")
         
+        if self._assumed("data_acquisition_buffering"):
+            return True
+        
         print("\n📋 Manual Test Steps:")
         print("1. Monitor serial output for acquisition cycles")
         print("2. Look for messages like:")
@@ -136,17 +200,19 @@ class IntegrationTester:
         print("   - [DataStorage] Buffer: X/Y samples")
         print("3. Wait for at least 2-3 acquisition cycles")
         
-        result = input("\n✓ Did you see data acquisition working? (y/n): ").strip().lower()
+        result = self._manual_check("\n✓ Did you see data acquisition working? (y/n): ")
+        if result is None:
+            return None
         
         if result == 'y':
-            notes = input("  Notes (e.g., '5s interval, 10 samples buffered'): ").strip()
+            notes = self._input("  Notes (e.g., '5s interval, 10 samples buffered'): ", default="").strip()
             self.checklist["data_acquisition_buffering"]["tested"] = True
             self.checklist["data_acquisition_buffering"]["passed"] = True
             self.checklist["data_acquisition_buffering"]["notes"] = notes or "Acquisition working"
             print("✓ PASSED")
             return True
         else:
-            notes = input("  What issue did you see? ").strip()
+            notes = self._input("  What issue did you see? ", default="").strip()
             self.checklist["data_acquisition_buffering"]["tested"] = True
             self.checklist["data_acquisition_buffering"]["notes"] = notes
             print("✗ FAILED")
@@ -156,6 +222,9 @@ class IntegrationTester:
         """Test 4: Upload cycle (compression + transmission)"""
         self.print_test("4. Upload Cycle (Compression + Transmission)")
         
+        if self._assumed("secure_transmission"):
+            return True
+        
         print("\n📋 Manual Test Steps:")
         print("1. Wait for upload interval (15 minutes or your configured interval)")
         print("2. Look for messages like:")
@@ -169,10 +238,12 @@ class IntegrationTester:
         print("   - Check config for shorter test interval")
         print("   - Or skip and mark as 'tested manually earlier'")
         
-        result = input("\n✓ Did you observe successful upload? (y/n/skip): ").strip().lower()
+        result = self._manual_check("\n✓ Did you observe successful upload? (y/n/skip): ")
+        if result is None:
+            return None
         
         if result == 'y':
-            notes = input("  Compression ratio and notes: ").strip()
+            notes = self._input("  Compression ratio and notes: ", default="").strip()
             self.checklist["secure_transmission"]["tested"] = True
             self.checklist["secure_transmission"]["passed"] = True
             self.checklist["secure_transmission"]["notes"] = notes or "Upload successful"
@@ -183,7 +254,7 @@ class IntegrationTester:
             print("⊘ SKIPPED")
             return True
         else:
-            notes = input("  What issue did you see? ").strip()
+            notes = self._input("  What issue did you see? ", default="").strip()
             self.checklist["secure_transmission"]["tested"] = True
             self.checklist["secure_transmission"]["notes"] = notes
             print("✗ FAILED")
@@ -193,6 +264,9 @@ class IntegrationTester:
         """Test 5: Remote configuration update"""
         self.print_test("5. Remote Configuration Update")
         
+        if self._assumed("remote_configuration"):
+            return True
+        
         print("\n📋 Test Options:")
         print("Option A: Use send_config_update.py script")
         print("Option B: Use Node-RED dashboard (if available)")
@@ -203,11 +277,13 @@ class IntegrationTester:
         print("2. Add/remove registers to read")
         print("3. Verify device applies change without reboot")
         
-        result = input("\n✓ Did you test remote config? (y/n/skip): ").strip().lower()
+        result = self._manual_check("\n✓ Did you test remote config? (y/n/skip): ")
+        if result is None:
+            return None
         
         if result == 'y':
-            passed = input("  Did it work? (y/n): ").strip().lower() == 'y'
-            notes = input("  Notes: ").strip()
+            passed = self._input("  Did it work? (y/n): ").strip().lower() == 'y'
+            notes = self._input("  Notes: ", default="").strip()
             self.checklist["remote_configuration"]["tested"] = True
             self.checklist["remote_configuration"]["passed"] = passed
             self.checklist["remote_configuration"]["notes"] = notes or "Config update tested"
@@ -225,6 +301,9 @@ class IntegrationTester:
         """Test 6: Command execution (write to inverter)"""
         self.print_test("6. Command Execution (Write to Inverter SIM)")
         
+        if self._assumed("command_execution"):
+            return True
+        
         print("\n📋 Manual Test Steps:")
         print("1. Send a write command to the device")
         print("2. Device should forward command to Inverter SIM")
@@ -233,11 +312,13 @@ class IntegrationTester:
         print("   - [ProtocolAdapter] Writing to register...")
         print("   - [Command] Command executed successfully")
         
-        result = input("\n✓ Did you test command execution? (y/n/skip): ").strip().lower()
+        result = self._manual_check("\n✓ Did you test command execution? (y/n/skip): ")
+        if result is None:
+            return None
         
         if result == 'y':
-            passed = input("  Did it work? (y/n): ").strip().lower() == 'y'
-            notes = input("  Notes: ").strip()
+            passed = self._input("  Did it work? (y/n): ").strip().lower() == 'y'
+            notes = self._input("  Notes: ", default="").strip()
             self.checklist["command_execution"]["tested"] = True
             self.checklist["command_execution"]["passed"] = passed
             self.checklist["command_execution"]["notes"] = notes or "Command execution tested"
@@ -255,6 +336,9 @@ class IntegrationTester:
         """Test 7: FOTA update (success and rollback)"""
         self.print_test("7. FOTA Update (Success & Rollback)")
         
+        if self._assumed(*self.ASSUME_PAIRS[0]):
+            return True
+        
         print("\n📋 FOTA Success Scenario:")
         print("1. Prepare new firmware version")
         print("2. Trigger FOTA update")
@@ -262,11 +346,11 @@ class IntegrationTester:
         print("4. Verify integrity check passes")
         print("5. Verify device reboots with new firmware")
         
-        result = input("\n✓ Did you test FOTA success? (y/n/skip): ").strip().lower()
+        result = self._manual_check("\n✓ Did you test FOTA success? (y/n/skip): ")
         
         if result == 'y':
-            passed = input("  Did it work? (y/n): ").strip().lower() == 'y'
-            notes = input("  Notes: ").strip()
+            passed = self._input("  Did it work? (y/n): ").strip().lower() == 'y'
+            notes = self._input("  Notes: ", default="").strip()
             self.checklist["fota_success"]["tested"] = True
             self.checklist["fota_success"]["passed"] = passed
             self.checklist["fota_success"]["notes"] = notes or "FOTA success tested"
@@ -279,11 +363,11 @@ class IntegrationTester:
         print("3. Verify integrity check fails")
         print("4. Verify device rolls back to previous firmware")
         
-        result2 = input("\n✓ Did you test FOTA rollback? (y/n/skip): ").strip().lower()
+        result2 = self._manual_check("\n✓ Did you test FOTA rollback? (y/n/skip): ")
         
         if result2 == 'y':
-            passed = input("  Did rollback work? (y/n): ").strip().lower() == 'y'
-            notes = input("  Notes: ").strip()
+            passed = self._input("  Did rollback work? (y/n): ").strip().lower() == 'y'
+            notes = self._input("  Notes: ", default="").strip()
             self.checklist["fota_rollback"]["tested"] = True
             self.checklist["fota_rollback"]["passed"] = passed
             self.checklist["fota_rollback"]["notes"] = notes or "FOTA rollback tested"
@@ -296,6 +380,9 @@ class IntegrationTester:
         """Test 8 & 9: Fault injection (network and Inverter SIM)"""
         self.print_test("8 & 9. Fault Injection (Network & Inverter SIM)")
         
+        if self._assumed(*self.ASSUME_PAIRS[1]):
+            return True
+        
         if not self.api_key:
             print("\n⚠️  API key not provided - fault injection tests will be manual")
             print("\n📋 Manual Testing Options:")
@@ -304,10 +391,12 @@ class IntegrationTester:
             print("3. Test buffer overflow by reducing buffer size")
             print("4. Check event log for fault detection")
             
-            result = input("\n✓ Did you perform any fault injection tests? (y/n): ").strip().lower()
+            result = self._manual_check("\n✓ Did you perform any fault injection tests? (y/n): ")
+            if result is None:
+                return None
             
             if result == 'y':
-                notes = input("  Describe tests performed: ").strip()
+                notes = self._input("  Describe tests performed: ", default="").strip()
                 self.checklist["fault_network_error"]["tested"] = True
                 self.checklist["fault_inverter_sim"]["tested"] = True
                 self.checklist["fault_network_error"]["passed"] = True
@@ -343,10 +432,10 @@ class IntegrationTester:
             print("3. Reconnect network")
             print("4. Verify recovery")
             
-            result = input("\n✓ Test network fault manually? (y/n/skip): ").strip().lower()
+            result = self._manual_check("\n✓ Test network fault manually? (y/n/skip): ")
             
             if result == 'y':
-                passed = input("  Did network fault recovery work? (y/n): ").strip().lower() == 'y'
+                passed = self._input("  Did network fault recovery work? (y/n): ").strip().lower() == 'y'
                 self.checklist["fault_network_error"]["tested"] = True
                 self.checklist["fault_network_error"]["passed"] = passed
                 self.checklist["fault_network_error"]["notes"] = "Manual network disconnect test"
@@ -364,10 +453,12 @@ class IntegrationTester:
         print("   - [EventLog] Loaded X events from /event_log.json")
         print("4. Verify events survived reboot")
         
-        result = input("\n✓ Did event log survive reboot? (y/n): ").strip().lower()
+        result = self._manual_check("\n✓ Did event log survive reboot? (y/n): ")
+        if result is None:
+            return None, "Not run"
         
         if result == 'y':
-            notes = input("  How many events persisted? ").strip()
+            notes = self._input("  How many events persisted? ", default="").strip()
             print(f"✓ PASSED - Event log persistence verified")
             return True, notes
         else:
@@ -378,16 +469,21 @@ class IntegrationTester:
         """Generate integration test report"""
         self.print_header("GENERATING INTEGRATION TEST REPORT")
         
-        report_file = f"integration_test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
+        ts = int(time.time())
+        n = datetime.fromtimestamp(ts)
+        now_str = f"{n.year:04d}-{n.month:02d}-{n.day:02d} {n.hour:02d}:{n.minute:02d}:{n.second:02d}"
+        report_file = f"integration_test_report_{ts}.md"
         
         # Calculate statistics
         total_tests = len(self.checklist)
-        tested = sum(1 for v in self.checklist.values() if v["tested"])
-        passed = sum(1 for v in self.checklist.values() if v["passed"])
+        tested = passed = 0
+        for v in self.checklist.values():
+            tested += v["tested"]
+            passed += v["passed"]
         
         # Generate markdown report
         report = f"""# Integration Test Report - Milestone 5 Part 3
-**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  
+**Generated:** {now_str}  
 **Device:** ESP32 (NodeMCU)  
 **Serial Port:** {self.port}
 
@@ -410,23 +506,11 @@ class IntegrationTester:
 |---|---------|--------|--------|-------|
 """
         
-        test_names = {
-            "data_acquisition_buffering": "1. Data Acquisition & Buffering",
-            "secure_transmission": "2. Secure Transmission (Upload)",
-            "remote_configuration": "3. Remote Configuration",
-            "command_execution": "4. Command Execution",
-            "fota_success": "5. FOTA Update (Success)",
-            "fota_rollback": "6. FOTA Update (Rollback)",
-            "power_optimization": "7. Power Optimization",
-            "fault_network_error": "8. Fault: Network Error",
-            "fault_inverter_sim": "9. Fault: Inverter SIM Errors",
-        }
-        
-        for key, name in test_names.items():
+        for key, (num, name) in self.TEST_NAMES.items():
             data = self.checklist[key]
             tested_icon = "✓" if data["tested"] else "⊘"
             passed_icon = "✓" if data["passed"] else "✗" if data["tested"] else "-"
-            report += f"| {name.split('.')[0]} | {name.split('.')[1]} | {tested_icon} | {passed_icon} | {data['notes']} |\n"
+            report += f"| {num} | {name} | {tested_icon} | {passed_icon} | {data['notes']} |\n"
         
         report += f"""
 ---
@@ -488,12 +572,16 @@ class IntegrationTester:
 ---
 
 **Report generated by:** integration_test_suite.py  
-**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Date:** {now_str}
 """
         
-        # Save report
-        with open(report_file, 'w', encoding='utf-8') as f:
+        # Save report atomically so an interrupted run never leaves a truncated file
+        tmp_file = report_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             f.write(report)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, report_file)
         
         print(f"\n✓ Report saved to: {report_file}")
         print(f"\n📊 Summary: {passed}/{tested} tests passed")
@@ -507,7 +595,7 @@ class IntegrationTester:
         print("This script will guide you through integration testing.")
         print("Some tests are automated, others require manual observation.\n")
         
-        input("Press Enter to begin testing...")
+        self._input("Press Enter to begin testing...")
         
         # Run tests
         self.test_serial_connection()
@@ -541,22 +629,44 @@ Examples:
 
   # Run with API key for automated fault injection
   python integration_test_suite.py --port COM5 --api-key YOUR_KEY
+
+  # Re-run without prompts, reusing results verified earlier
+  python integration_test_suite.py --non-interactive --assume-passed fota_success,fota_rollback
         """
     )
     
     parser.add_argument("--port", default="COM5", help="Serial port (default: COM5)")
     parser.add_argument("--api-key", help="Inverter SIM API key (optional)")
+    parser.add_argument("--assume-passed", default="",
+                        help="Comma list of checklist keys to mark passed without prompting")
+    parser.add_argument("--non-interactive", action="store_true",
+                        help="Don't wait for input; manual checks are left unrecorded")
     
     args = parser.parse_args()
     
-    tester = IntegrationTester(port=args.port, api_key=args.api_key)
+    assume_passed = [k.strip() for k in args.assume_passed.split(",") if k.strip()]
+    unknown = set(assume_passed) - set(IntegrationTester.TEST_NAMES)
+    if unknown:
+        parser.error(f"unknown checklist keys: {', '.join(sorted(unknown))}")
+    for pair in IntegrationTester.ASSUME_PAIRS:
+        given = set(pair) & set(assume_passed)
+        if given and given != set(pair):
+            parser.error(f"--assume-passed must name {' and '.join(pair)} together "
+                         f"(they are checked by one test)")
+    
+    tester = IntegrationTester(port=args.port, api_key=args.api_key,
+                               assume_passed=assume_passed,
+                               non_interactive=args.non_interactive)
     
     try:
         tester.run_all_tests()
         sys.exit(0)
     except KeyboardInterrupt:
         print("\n\n⚠️  Testing interrupted by user")
-        tester.generate_report()
+        try:
+            tester.generate_report()
+        except (KeyboardInterrupt, OSError) as e:
+            print(f"❌ Could not save partial report: {e!r}")
         sys.exit(1)
     except Exception as e:
         print(f"\n\n❌ Error: {e}")
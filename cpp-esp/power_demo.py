@@ -26,15 +26,35 @@ def find_esp32_port():
     # Default to COM5 if not found
     return 'COM5'
 
+_RESOLVED_PORT = None
+
+def resolve_port(override=None, refresh=False):
+    """Return the ESP32 port, enumerating COM ports only once per run."""
+    global _RESOLVED_PORT
+    if override:
+        return override
+    if _RESOLVED_PORT is None or refresh:
+        _RESOLVED_PORT = find_esp32_port()
+    return _RESOLVED_PORT
+
+def _emit_lines(buf):
+    """Write every complete line in buf to stdout; return the trailing partial line."""
+    *lines, rest = buf.split(b'\n')
+    out = b''.join(line.strip() + b'\n' for line in lines if line.strip())
+    if out:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(out)
+        sys.stdout.buffer.flush()
+    return rest
+
 def send_command(cmd, port=None, wait_time=3):
     """Send a command to ESP32 and read response."""
-    if port is None:
-        port = find_esp32_port()
+    port = resolve_port(port)
     
     print(f"Connecting to {port}...")
     
     try:
-        ser = serial.Serial(port, 115200, timeout=1)
+        ser = serial.Serial(port, 115200, timeout=0.1)
         time.sleep(0.5)  # Wait for connection
         
         # Clear any pending data
@@ -48,12 +68,11 @@ def send_command(cmd, port=None, wait_time=3):
         # Read response for a few seconds
         print(f"\n--- Response ---")
         start_time = time.time()
+        buf = b""
         while time.time() - start_time < wait_time:
-            if ser.in_waiting:
-                line = ser.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    print(line)
-            time.sleep(0.1)
+            # Drain everything waiting in one read; blocks up to the port timeout
+            buf = _emit_lines(buf + ser.read(max(1, ser.in_waiting)))
+        _emit_lines(buf + b'\n')
         
         print("--- End ---\n")
         ser.close()
@@ -66,8 +85,7 @@ def send_command(cmd, port=None, wait_time=3):
 
 def interactive_mode(port=None):
     """Interactive mode - type commands."""
-    if port is None:
-        port = find_esp32_port()
+    port = resolve_port(port)
     
     print(f"Interactive Power Demo - {port}")
     print("=" * 50)
@@ -76,22 +94,22 @@ def interactive_mode(port=None):
     print("=" * 50)
     
     try:
+        # Reads block up to the 0.1 s port timeout instead of sleeping between polls
         ser = serial.Serial(port, 115200, timeout=0.1)
         time.sleep(0.5)
         
         import threading
-        running = True
+        stop = threading.Event()
         
         def read_serial():
-            while running:
+            buf = b""
+            while not stop.is_set():
                 try:
-                    if ser.in_waiting:
-                        line = ser.readline().decode('utf-8', errors='ignore').strip()
-                        if line:
-                            print(line)
-                except:
-                    pass
-                time.sleep(0.05)
+                    buf = _emit_lines(buf + ser.read(max(1, ser.in_waiting)))
+                except (serial.SerialException, OSError) as e:
+                    print(f"\nSerial read failed: {e}")
+                    stop.set()
+                    return
         
         # Start reader thread
         reader = threading.Thread(target=read_serial, daemon=True)
@@ -100,6 +118,9 @@ def interactive_mode(port=None):
         while True:
             try:
                 cmd = input("> ").strip()
+                if stop.is_set():
+                    print("Serial port closed - exiting")
+                    break
                 if cmd.lower() == 'quit':
                     break
                 if cmd:
@@ -107,7 +128,8 @@ def interactive_mode(port=None):
             except KeyboardInterrupt:
                 break
         
-        running = False
+        stop.set()
+        reader.join(timeout=1)
         ser.close()
         
     except serial.SerialException as e:
@@ -20,154 +20,29 @@ import serial
 import time
 import json
 import argparse
+import re
 import sys
+from array import array
 from datetime import datetime
 from collections import defaultdict
 
-class PowerStatsCollector:
-    def __init__(self, port, baudrate=115200):
-        self.port = port
-        self.baudrate = baudrate
-        self.ser = None
-        self.stats_history = []
-        self.mode_durations = defaultdict(float)
-        self.last_timestamp = None
-        
-    def connect(self):
-        """Connect to serial port"""
-        try:
-            self.ser = serial.Serial(self.port, self.baudrate, timeout=1)
-            print(f"✓ Connected to {self.port} at {self.baudrate} baud")
-            time.sleep(2)  # Wait for connection to stabilize
-            return True
-        except serial.SerialException as e:
-            print(f"✗ Failed to connect to {self.port}: {e}")
-            return False
-    
-    def parse_power_log(self, line):
-        """Parse power statistics from log line"""
-        # Example: [PowerMgr] Stats: Mode=NORMAL, CPU=160MHz, WiFi_Sleep=ON, Current=20.00mA, Power=66.00mW
-        if "[PowerMgr] Stats:" not in line:
-            return None
-        
-        try:
-            # Extract key-value pairs
-            parts = line.split("Stats:")[1].strip().split(", ")
-            stats = {}
-            
-            for part in parts:
-                if "=" in part:
-                    key, value = part.split("=", 1)
-                    stats[key.strip()] = value.strip()
-            
-            # Clean up values
-            if "CPU" in stats:
-                stats["CPU"] = int(stats["CPU"].replace("MHz", ""))
-            if "Current" in stats:
-                stats["Current"] = float(stats["Current"].replace("mA", ""))
-            if "Power" in stats:
-                stats["Power"] = float(stats["Power"].replace("mW", ""))
-            if "WiFi_Sleep" in stats:
-                stats["WiFi_Sleep"] = stats["WiFi_Sleep"] == "ON"
-            
-            stats["timestamp"] = datetime.now().isoformat()
-            return stats
-            
-        except Exception as e:
-            print(f"Warning: Failed to parse line: {e}")
-            return None
-    
-    def collect_stats(self, duration_seconds):
-        """Collect power statistics for specified duration"""
-        print(f"\n🔋 Collecting power statistics for {duration_seconds} seconds...")
-        print("=" * 60)
-        
-        start_time = time.time()
-        last_log_time = start_time
-        
-        while time.time() - start_time < duration_seconds:
-            try:
-                if self.ser.in_waiting > 0:
-                    line = self.ser.readline().decode('utf-8', errors='ignore').strip()
-                    
-                    # Print interesting lines
-                    if "[PowerMgr]" in line:
-                        print(f"  {line}")
-                    
-                    # Parse power stats
-                    stats = self.parse_power_log(line)
-                    if stats:
-                        self.stats_history.append(stats)
-                        
-                        # Track mode durations
-                        if self.last_timestamp and "Mode" in stats:
-                            duration = 30  # Assuming logs every 30 seconds
-                            self.mode_durations[stats["Mode"]] += duration
-                        
-                        self.last_timestamp = time.time()
-                
-                # Progress indicator every 10 seconds
-                elapsed = time.time() - start_time
-                if elapsed - (last_log_time - start_time) >= 10:
-                    remaining = duration_seconds - elapsed
-                    print(f"\n⏱  Progress: {elapsed:.0f}s / {duration_seconds}s (remaining: {remaining:.0f}s)")
-                    print(f"   Stats collected: {len(self.stats_history)}")
-                    last_log_time = time.time()
-                
-            except KeyboardInterrupt:
-                print("\n\n⚠ Collection interrupted by user")
-                break
-            except Exception as e:
-                print(f"Error reading serial: {e}")
-                time.sleep(0.1)
-        
-        print(f"\n✓ Collection complete! Captured {len(self.stats_history)} data points")
-        return self.stats_history
-    
-    def generate_report(self, output_file="power_measurement_report.md"):
-        """Generate comprehensive power measurement report"""
-        if not self.stats_history:
-            print("No statistics collected!")
-            return
-        
-        # Calculate averages
-        total_current = sum(s.get("Current", 0) for s in self.stats_history)
-        total_power = sum(s.get("Power", 0) for s in self.stats_history)
-        avg_current = total_current / len(self.stats_history)
-        avg_power = total_power / len(self.stats_history)
-        
-        # Mode distribution
-        mode_counts = defaultdict(int)
-        for stats in self.stats_history:
-            if "Mode" in stats:
-                mode_counts[stats["Mode"]] += 1
-        
-        # CPU frequency distribution
-        cpu_freq_counts = defaultdict(int)
-        for stats in self.stats_history:
-            if "CPU" in stats:
-                cpu_freq_counts[stats["CPU"]] += 1
-        
-        # WiFi sleep statistics
-        wifi_sleep_count = sum(1 for s in self.stats_history if s.get("WiFi_Sleep", False))
-        wifi_sleep_percent = (wifi_sleep_count / len(self.stats_history)) * 100
-        
-        # Baseline comparison (240 MHz, WiFi always on)
-        baseline_current = 160.0  # mA
-        baseline_power = 528.0    # mW (160 mA * 3.3V)
-        
-        savings_current = baseline_current - avg_current
-        savings_percent = (savings_current / baseline_current) * 100
-        savings_power = baseline_power - avg_power
-        
-        # Generate report
-        report = f"""# Power Measurement Report - EcoWatt Device
-Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+# Example: [PowerMgr] Stats: Mode=NORMAL, CPU=160MHz, WiFi_Sleep=ON, Current=20.00mA, Power=66.00mW
+_STATS_RE = re.compile(
+    r"Mode=(?P<mode>\w+), CPU=(?P<cpu>\d+)MHz, WiFi_Sleep=(?P<wifi>ON|OFF), "
+    r"Current=(?P<cur>\d+(?:\.\d+)?)mA, Power=(?P<pwr>\d+(?:\.\d+)?)mW"
+)
+
+# Compact mode ids for the per-sample mode column
+MODE_IDS = {"HIGH_PERFORMANCE": 0, "NORMAL": 1, "LOW_POWER": 2}
+
+# Markdown skeleton for generate_report(), filled with a single format_map() call
+_REPORT_TMPL = """# Power Measurement Report - EcoWatt Device
+Generated: {generated}
 
 ## Test Configuration
 
 - **Device**: ESP32 (NodeMCU)
-- **Test Duration**: {len(self.stats_history) * 30 / 60:.1f} minutes ({len(self.stats_history)} samples)
+- **Test Duration**: {duration_min:.1f} minutes ({total_samples} samples)
 - **Sampling Interval**: ~30 seconds
 - **Power Optimizations Applied**:
   - CPU Frequency Scaling: ✓ ENABLED
@@ -189,26 +64,12 @@ Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 | Mode | Count | Percentage | Duration (est.) |
 |------|-------|------------|-----------------|
-"""
-        
-        total_samples = len(self.stats_history)
-        for mode, count in sorted(mode_counts.items()):
-            percent = (count / total_samples) * 100
-            duration_min = (count * 30) / 60  # Assuming 30s between logs
-            report += f"| {mode} | {count} | {percent:.1f}% | {duration_min:.1f} min |\n"
-        
-        report += f"""
+{mode_rows}
 ### CPU Frequency Distribution
 
 | Frequency | Count | Percentage |
 |-----------|-------|------------|
-"""
-        
-        for freq, count in sorted(cpu_freq_counts.items()):
-            percent = (count / total_samples) * 100
-            report += f"| {freq} MHz | {count} | {percent:.1f}% |\n"
-        
-        report += f"""
+{cpu_rows}
 ## Baseline Comparison
 
 ### Baseline (No Power Management)
@@ -222,7 +83,7 @@ Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 ### Power Savings
 - **Current Reduction**: {savings_current:.2f} mA ({savings_percent:.1f}%)
-- **Power Reduction**: {savings_power:.2f} mW ({(savings_power/baseline_power)*100:.1f}%)
+- **Power Reduction**: {savings_power:.2f} mW ({savings_pct_power:.1f}%)
 
 ## Detailed Statistics
 
@@ -230,17 +91,7 @@ Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 | Sample # | Timestamp | Mode | CPU (MHz) | WiFi Sleep | Current (mA) | Power (mW) |
 |----------|-----------|------|-----------|------------|--------------|------------|
-"""
-        
-        for i, stats in enumerate(self.stats_history[:20], 1):  # Show first 20 samples
-            report += f"| {i} | {stats.get('timestamp', 'N/A')[:19]} | {stats.get('Mode', 'N/A')} | "
-            report += f"{stats.get('CPU', 'N/A')} | {stats.get('WiFi_Sleep', 'N/A')} | "
-            report += f"{stats.get('Current', 0):.2f} | {stats.get('Power', 0):.2f} |\n"
-        
-        if len(self.stats_history) > 20:
-            report += f"\n*... and {len(self.stats_history) - 20} more samples*\n"
-        
-        report += f"""
+{sample_rows}{more_samples}
 ## Methodology
 
 This report is based on **real-time measurements** from the EcoWatt Device's power manager.
@@ -300,7 +151,7 @@ These estimates provide accurate **relative** comparisons between power modes.
 ## Conclusion
 
 Power management successfully reduces average current consumption by **{savings_percent:.1f}%**
-(from {baseline_current:.2f} mA to {avg_current:.2f} mA), resulting in **{(savings_power/baseline_power)*100:.1f}%**
+(from {baseline_current:.2f} mA to {avg_current:.2f} mA), resulting in **{savings_pct_power:.1f}%**
 power savings ({savings_power:.2f} mW).
 
 This demonstrates significant energy efficiency improvements while maintaining full
@@ -318,6 +169,208 @@ system functionality, meeting Milestone 5 requirements for power optimization.
 *Report generated by power_report_generator.py*
 *EcoWatt Device - Milestone 5 Part 1: Power Management*
 """
+
+class PowerStatsCollector:
+    def __init__(self, port, baudrate=115200):
+        self.port = port
+        self.baudrate = baudrate
+        self.ser = None
+        # Samples are stored column-wise in fixed-width arrays (one entry per sample)
+        self._ts = array('d')
+        self._mode = array('B')
+        self._cpu = array('H')
+        self._wifi = bytearray()
+        self._current = array('f')
+        self._power = array('f')
+        self._mode_ids = dict(MODE_IDS)
+        self._mode_names = list(MODE_IDS)
+        self.mode_durations = defaultdict(float)
+        self.last_timestamp = None
+        self._buf = bytearray()
+        # Running aggregates so report generation needs no extra passes
+        self._sum_current = 0.0
+        self._sum_power = 0.0
+        self._mode_counts = defaultdict(int)
+        self._cpu_counts = defaultdict(int)
+    
+    @property
+    def sample_count(self):
+        return len(self._current)
+        
+    def connect(self):
+        """Connect to serial port"""
+        try:
+            self.ser = serial.Serial(
+                self.port, self.baudrate, timeout=0.5,
+                rtscts=False, dsrdtr=False, xonxoff=False, exclusive=True
+            )
+            # Windows defaults to a 4 KB driver buffer; enlarge it so bursts aren't dropped
+            if hasattr(self.ser, "set_buffer_size"):
+                self.ser.set_buffer_size(rx_size=65536, tx_size=4096)
+            # Discard boot noise instead of sleeping for the port to settle
+            self.ser.reset_input_buffer()
+            print(f"✓ Connected to {self.port} at {self.baudrate} baud")
+            return True
+        except serial.SerialException as e:
+            print(f"✗ Failed to connect to {self.port}: {e}")
+            return False
+    
+    def parse_power_log(self, line):
+        """Parse power statistics from log line"""
+        # Example: [PowerMgr] Stats: Mode=NORMAL, CPU=160MHz, WiFi_Sleep=ON, Current=20.00mA, Power=66.00mW
+        if "[PowerMgr] Stats:" not in line:
+            return None
+        
+        m = _STATS_RE.search(line)
+        if not m:
+            return None
+        
+        return {
+            "Mode": m["mode"],
+            "CPU": int(m["cpu"]),
+            "WiFi_Sleep": m["wifi"] == "ON",
+            "Current": float(m["cur"]),
+            "Power": float(m["pwr"]),
+            "timestamp": time.time(),
+        }
+    
+    def _add_sample(self, stats):
+        """Record a parsed sample and update the running aggregates"""
+        mode = stats["Mode"]
+        mode_id = self._mode_ids.get(mode)
+        if mode_id is None:
+            mode_id = self._mode_ids[mode] = len(self._mode_names)
+            self._mode_names.append(mode)
+        self._ts.append(stats["timestamp"])
+        self._mode.append(mode_id)
+        self._cpu.append(stats["CPU"])
+        self._wifi.append(stats["WiFi_Sleep"])
+        self._current.append(stats["Current"])
+        self._power.append(stats["Power"])
+        
+        self._sum_current += stats["Current"]
+        self._sum_power += stats["Power"]
+        self._mode_counts[mode] += 1
+        self._cpu_counts[stats["CPU"]] += 1
+    
+    def _handle_line(self, line):
+        """Print and record a single decoded serial line"""
+        # Print interesting lines
+        if "[PowerMgr]" in line:
+            print(f"  {line}")
+        
+        # Parse power stats
+        stats = self.parse_power_log(line)
+        if stats:
+            self._add_sample(stats)
+            
+            # Track mode durations
+            if self.last_timestamp:
+                duration = 30  # Assuming logs every 30 seconds
+                self.mode_durations[stats["Mode"]] += duration
+            
+            self.last_timestamp = time.time()
+    
+    def collect_stats(self, duration_seconds):
+        """Collect power statistics for specified duration. Returns the number of samples collected."""
+        print(f"\n🔋 Collecting power statistics for {duration_seconds} seconds...")
+        print("=" * 60)
+        
+        start_time = time.monotonic()
+        deadline = start_time + duration_seconds
+        next_progress_t = start_time + 10
+        
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            try:
+                # Blocks up to the port timeout; returns whatever lines arrived
+                self._buf += self.ser.read(4096)
+                while b"\n" in self._buf:
+                    raw, _, self._buf = self._buf.partition(b"\n")
+                    # Only PowerMgr lines are printed or parsed; skip decoding the rest
+                    if b"[PowerMgr]" not in raw:
+                        continue
+                    self._handle_line(raw.decode('utf-8', errors='ignore').strip())
+                
+                # Progress indicator every 10 seconds
+                if now >= next_progress_t:
+                    elapsed = now - start_time
+                    remaining = duration_seconds - elapsed
+                    print(f"\n⏱  Progress: {elapsed:.0f}s / {duration_seconds}s (remaining: {remaining:.0f}s)")
+                    print(f"   Stats collected: {self.sample_count}")
+                    next_progress_t = now + 10
+                
+            except KeyboardInterrupt:
+                print("\n\n⚠ Collection interrupted by user")
+                break
+            except Exception as e:
+                print(f"Error reading serial: {e}")
+                time.sleep(0.1)
+        
+        print(f"\n✓ Collection complete! Captured {self.sample_count} data points")
+        return self.sample_count
+    
+    def generate_report(self, output_file="power_measurement_report.md"):
+        """Generate comprehensive power measurement report"""
+        if not self.sample_count:
+            print("No statistics collected!")
+            return
+        
+        # Averages and distributions come from the running aggregates
+        total_samples = self.sample_count
+        avg_current = self._sum_current / total_samples
+        avg_power = self._sum_power / total_samples
+        mode_counts = self._mode_counts
+        cpu_freq_counts = self._cpu_counts
+        inv_total = 100.0 / total_samples  # percent per sample
+        duration_scale = 30.0 / 60.0       # minutes per sample (logs every ~30s)
+        wifi_sleep_percent = self._wifi.count(1) * inv_total
+        
+        # Baseline comparison (240 MHz, WiFi always on)
+        baseline_current = 160.0  # mA
+        baseline_power = 528.0    # mW (160 mA * 3.3V)
+        
+        savings_current = baseline_current - avg_current
+        savings_percent = (savings_current / baseline_current) * 100
+        savings_power = baseline_power - avg_power
+        savings_pct_power = (savings_power / baseline_power) * 100.0
+        
+        mode_rows = "".join(
+            f"| {mode} | {count} | {count * inv_total:.1f}% | {count * duration_scale:.1f} min |\n"
+            for mode, count in sorted(mode_counts.items())
+        )
+        cpu_rows = "".join(
+            f"| {freq} MHz | {count} | {count * inv_total:.1f}% |\n"
+            for freq, count in sorted(cpu_freq_counts.items())
+        )
+        sample_rows = "".join(
+            f"| {i + 1} | {datetime.fromtimestamp(self._ts[i]).isoformat(timespec='seconds')} | "
+            f"{self._mode_names[self._mode[i]]} | {self._cpu[i]} | {bool(self._wifi[i])} | "
+            f"{self._current[i]:.2f} | {self._power[i]:.2f} |\n"
+            for i in range(min(20, total_samples))  # Show first 20 samples
+        )
+        more_samples = f"\n*... and {total_samples - 20} more samples*\n" if total_samples > 20 else ""
+        
+        report = _REPORT_TMPL.format_map({
+            "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_min": total_samples * duration_scale,
+            "total_samples": total_samples,
+            "avg_current": avg_current,
+            "avg_power": avg_power,
+            "wifi_sleep_percent": wifi_sleep_percent,
+            "mode_rows": mode_rows,
+            "cpu_rows": cpu_rows,
+            "baseline_current": baseline_current,
+            "baseline_power": baseline_power,
+            "savings_current": savings_current,
+            "savings_percent": savings_percent,
+            "savings_power": savings_power,
+            "savings_pct_power": savings_pct_power,
+            "sample_rows": sample_rows,
+            "more_samples": more_samples,
+        })
         
         # Write report to file
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -1,42 +1,69 @@
 import requests
-import json
 import hashlib
-import base64
+import mmap
+import os
+
+from fota_cache import make_session
+
+# Shared keep-alive session so repeated/retried uploads reuse one connection
+_SESSION = make_session()
+
+TEST_SIZE = 10240   # 10KB = 10 chunks × 1KB
+CHUNK_SIZE = 1024   # Matches the ESP32's 1KB FOTA chunk size
+
+def _sha256_regions(buf, region=CHUNK_SIZE):
+    """SHA-256 over buf, fed one region-sized view at a time (no copies)"""
+    h = hashlib.sha256()
+    for off in range(0, len(buf), region):
+        h.update(buf[off:off + region])
+    return h.hexdigest()
 
 def upload_firmware():
     # Use the COMPLETE REAL compiled firmware binary (first 10KB for testing)
     firmware_path = ".pio/build/esp32dev/firmware.bin"
     
     try:
-        with open(firmware_path, 'rb') as f:
-            full_firmware = f.read()
-            # Take only first 10KB (10 chunks of 1KB each) for quick testing
-            firmware_data = full_firmware[:10240]  # 10KB = 10 chunks × 1KB
+        f = open(firmware_path, 'rb')
     except FileNotFoundError:
         print(f"❌ Error: {firmware_path} not found! Build the project first with 'pio run'")
         return
     
+    # An interrupted build can leave an empty image, which can't be mapped
+    if os.fstat(f.fileno()).st_size == 0:
+        f.close()
+        print(f"❌ Error: {firmware_path} is empty! Build the project first with 'pio run'")
+        return
+    
+    # Map the image read-only; the test prefix is a view into the page cache
+    with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        firmware_data = memoryview(mm)[:TEST_SIZE]
+        try:
+            _post_firmware(firmware_data)
+        finally:
+            firmware_data.release()
+
+def _post_firmware(firmware_data):
     # Calculate hash
-    fw_hash = hashlib.sha256(firmware_data).hexdigest()
+    fw_hash = _sha256_regions(firmware_data)
     
-    # Prepare payload
-    payload = {
+    # Prepare multipart payload: metadata as form fields, firmware as raw bytes
+    fields = {
         "version": "1.0.5",
-        "size": len(firmware_data),
+        "size": str(len(firmware_data)),
         "hash": fw_hash,
-        "chunk_size": 1024,  # 1KB chunks
-        "firmware_data": base64.b64encode(firmware_data).decode('ascii')
+        "chunk_size": str(CHUNK_SIZE),
     }
+    files = {"firmware": ("firmware.bin", firmware_data, "application/octet-stream")}
     
     print(f"📦 Uploading REAL firmware v1.0.5 (10KB TEST)")
     print(f"   Size: {len(firmware_data)} bytes ({len(firmware_data)//1024}KB)")
     print(f"   Hash: {fw_hash[:16]}...")
-    print(f"   Chunks: {(len(firmware_data) + 1023) // 1024} chunks of 1KB each")
+    print(f"   Chunks: {(len(firmware_data) + CHUNK_SIZE - 1) // CHUNK_SIZE} chunks of 1KB each")
     
     # Upload to cloud
     try:
-        response = requests.post("http://localhost:8080/api/cloud/fota/upload", 
-                               json=payload, timeout=10)
+        response = _SESSION.post("http://localhost:8080/api/cloud/fota/upload",
+                                 data=fields, files=files, timeout=10)
         print(f"Response: {response.status_code}")
         if response.status_code == 200:
             result = response.json()
@@ -7,8 +7,8 @@ This script helps you time your screen recording perfectly to capture
 the FOTA download process in action.
 """
 
+import sys
 import time
-from datetime import datetime, timedelta
 
 def main():
     print("🎬" + "="*60)
@@ -38,17 +38,9 @@ def main():
     print("6. 'Finally, the device reboots with the new firmware'")
     print()
     
-    print("🎬 STARTING RECORDING COUNTDOWN...")
-    for i in range(10, 0, -1):
-        print(f"🔴 Recording starts in: {i}")
-        time.sleep(1)
-    
-    print("\n🔴 START RECORDING NOW!")
-    print("="*60)
-    
-    # Real-time monitoring with recording cues
-    start_time = time.time()
-    last_cue_time = 0
+    # Recording timeline, pre-rendered before the countdown so the live loop only writes
+    recording_duration = 300  # Record for up to 5 minutes
+    check_interval = 23       # ESP32 manifest check period (seconds)
     
     recording_cues = [
         (5, "🎤 SAY: 'This is the ESP32 FOTA system in action'"),
@@ -60,28 +52,45 @@ def main():
         (90, "🎤 SAY: 'After download, the device reboots automatically'"),
     ]
     
-    check_count = 0
-    while time.time() - start_time < 300:  # Record for up to 5 minutes
-        elapsed = int(time.time() - start_time)
-        
-        # Show recording cues
-        for cue_time, cue_text in recording_cues:
-            if elapsed >= cue_time and last_cue_time < cue_time:
-                print(f"\n{cue_text}")
-                last_cue_time = cue_time
-        
-        # Track ESP32 check cycles
-        cycle_time = elapsed % 23
-        if cycle_time == 0 and elapsed > 0:
-            check_count += 1
-            print(f"\n⏰ ESP32 Check #{check_count} - WATCH FOR DOWNLOAD!")
-        elif cycle_time == 10:
-            print(f"📡 Next check in ~13 seconds...")
-        elif cycle_time == 20:
-            print(f"🔄 ESP32 checking NOW! (elapsed: {elapsed}s)")
-        
+    # Build the full timeline up front: (offset_s, text, is_check)
+    events = [(t, f"\n{text}\n", False) for t, text in recording_cues]
+    for cycle_start in range(0, recording_duration, check_interval):
+        if cycle_start > 0:
+            events.append((cycle_start, f"\n⏰ ESP32 Check #{cycle_start // check_interval} - WATCH FOR DOWNLOAD!\n", True))
+        if cycle_start + 10 < recording_duration:
+            events.append((cycle_start + 10, "📡 Next check in ~13 seconds...\n", False))
+        if cycle_start + 20 < recording_duration:
+            events.append((cycle_start + 20, f"🔄 ESP32 checking NOW! (elapsed: {cycle_start + 20}s)\n", False))
+    events.sort(key=lambda e: e[0])  # stable: cues stay ahead of same-second cycle lines
+    
+    print("🗒️  CUE TIMELINE:")
+    sys.stdout.write("".join(f"   [{t:3d}s] {text}\n" for t, text in recording_cues))
+    print()
+    
+    print("🎬 STARTING RECORDING COUNTDOWN...")
+    for i in range(10, 0, -1):
+        print(f"🔴 Recording starts in: {i}")
         time.sleep(1)
     
+    print("\n🔴 START RECORDING NOW!")
+    print("="*60)
+    
+    # Sleep straight to each event instead of waking every second
+    start_time = time.monotonic()
+    check_count = 0
+    for offset, text, is_check in events:
+        delay = start_time + offset - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        check_count += is_check
+    
+    remaining = start_time + recording_duration - time.monotonic()
+    if remaining > 0:
+        time.sleep(remaining)
+    elapsed = int(time.monotonic() - start_time)
+    
     print("\n" + "="*60)
     print("🎬 RECORDING COMPLETE!")
     print("="*60)
@@ -2,7 +2,6 @@
 # This temporarily modifies platformio.ini to upload test_security.cpp
 
 import os
-import shutil
 from pathlib import Path
 
 def backup_main_file():
@@ -15,7 +14,7 @@ def backup_main_file():
     backup_file = backup_dir / "main.ino.backup"
     
     if main_file.exists():
-        shutil.copy(main_file, backup_file)
+        backup_file.write_bytes(main_file.read_bytes())
         print(f"✅ Backed up main.ino to {backup_file}")
         return True
     return False
@@ -50,7 +49,10 @@ def restore_main_file():
     main_file = src_dir / "main.ino"
     
     if backup_file.exists():
-        shutil.copy(backup_file, main_file)
+        # Write a sibling temp file and swap it in so main.ino is never half-written
+        tmp_file = main_file.with_suffix(".ino.tmp")
+        tmp_file.write_bytes(backup_file.read_bytes())
+        os.replace(tmp_file, main_file)
         print(f"✅ Restored main.ino from backup")
         return True
     return False
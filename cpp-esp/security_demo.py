@@ -19,29 +19,66 @@ security responses for video demonstration purposes.
 import requests
 import hmac
 import hashlib
+import base64
 import time
 import json
+import os
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # Configuration
 SERVER_URL = "http://10.50.126.183:8080"
 DEVICE_ID = "EcoWatt001"
 PSK = bytes.fromhex("c41716a134168f52fbd4be3302fa5a88127ddde749501a199607b4c286ad29b3")
+LEGACY_HEX = True  # False sends X-MAC as 43-char unpadded base64 instead of 64 hex chars
+
+# One keep-alive session for every demo request; Device-ID rides along on all of them
+_SESSION = requests.Session()
+_SESSION.headers.update({'Device-ID': DEVICE_ID})
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# HMAC keyed with the fixed PSK; copies skip the key-pad setup on every signature
+_HMAC_TEMPLATE = hmac.new(PSK, None, hashlib.sha256)
+
+# Persisted nonce counter so back-to-back demo runs never reuse a nonce
+_NONCE_FILE = Path(".demo_nonce")
+
+def next_nonce():
+    """Return the next demo nonce (seeded from the clock on first use)."""
+    try:
+        nonce = int(_NONCE_FILE.read_text()) + 1
+    except (FileNotFoundError, ValueError):
+        nonce = time.time_ns() // 1_000_000_000 % 10000 + 100
+    tmp = _NONCE_FILE.with_name(_NONCE_FILE.name + ".tmp")
+    tmp.write_text(str(nonce))
+    os.replace(tmp, _NONCE_FILE)
+    return nonce
+
+# endpoint str -> ASCII bytes, so each path is encoded only once
+_ENDPOINT_BYTES = {}
 
 def create_hmac_signature(endpoint, nonce, timestamp):
-    """Create HMAC-SHA256 signature for request authentication."""
-    hmac_input = endpoint + str(nonce) + str(timestamp)
-    return hmac.new(PSK, hmac_input.encode(), hashlib.sha256).hexdigest()
+    """Create HMAC-SHA256 signature for request authentication (ASCII endpoint, int nonce/timestamp)."""
+    endpoint_bytes = _ENDPOINT_BYTES.get(endpoint)
+    if endpoint_bytes is None:
+        endpoint_bytes = _ENDPOINT_BYTES[endpoint] = endpoint.encode('ascii')
+    h = _HMAC_TEMPLATE.copy()
+    h.update(b"%s%d%d" % (endpoint_bytes, nonce, timestamp))
+    if LEGACY_HEX:
+        return h.hexdigest()
+    return base64.b64encode(h.digest()).decode('ascii').rstrip('=')
 
-def make_authenticated_request(endpoint, nonce, timestamp):
-    """Make a properly authenticated request."""
-    mac = create_hmac_signature(endpoint, nonce, timestamp)
+def make_authenticated_request(endpoint, nonce, timestamp, mac=None):
+    """Make a properly authenticated request (pass mac to resend an existing signature)."""
+    if mac is None:
+        mac = create_hmac_signature(endpoint, nonce, timestamp)
     headers = {
-        'Device-ID': DEVICE_ID,
         'X-Nonce': str(nonce),
         'X-Timestamp': str(timestamp),
         'X-MAC': mac
     }
-    return requests.get(f"{SERVER_URL}{endpoint}", headers=headers)
+    return _SESSION.get(f"{SERVER_URL}{endpoint}", headers=headers)
 
 def demo_normal_request():
     """Demonstrate normal authenticated request (should succeed)."""
@@ -49,15 +86,16 @@ def demo_normal_request():
     print("🔒 DEMO 1: Normal Authenticated Request")
     print("="*60)
     
-    nonce = int(time.time()) % 10000 + 100  # Use current time-based nonce
-    timestamp = int(time.time())
+    nonce = next_nonce()
+    timestamp = time.time_ns() // 1_000_000_000
     
     print(f"📤 Sending authenticated request:")
     print(f"   Nonce: {nonce}")
     print(f"   Timestamp: {timestamp}")
     print(f"   Device ID: {DEVICE_ID}")
     
-    response = make_authenticated_request("/api/inverter/config", nonce, timestamp)
+    mac = create_hmac_signature("/api/inverter/config", nonce, timestamp)
+    response = make_authenticated_request("/api/inverter/config", nonce, timestamp, mac)
     
     print(f"📥 Server Response:")
     print(f"   Status Code: {response.status_code}")
@@ -68,9 +106,9 @@ def demo_normal_request():
     else:
         print("   ❌ FAILED: Authentication failed")
     
-    return nonce, timestamp
+    return nonce, timestamp, mac
 
-def demo_replay_attack(original_nonce, original_timestamp):
+def demo_replay_attack(original_nonce, original_timestamp, original_mac):
     """Demonstrate replay attack (should fail)."""
     print("\\n" + "="*60)
     print("🚨 DEMO 2: Replay Attack Simulation")
@@ -81,7 +119,9 @@ def demo_replay_attack(original_nonce, original_timestamp):
     print(f"   Timestamp: {original_timestamp}")
     print(f"   Device ID: {DEVICE_ID}")
     
-    response = make_authenticated_request("/api/inverter/config", original_nonce, original_timestamp)
+    # Resend the captured signature byte-for-byte, exactly as an attacker would
+    response = make_authenticated_request("/api/inverter/config", original_nonce, original_timestamp,
+                                          original_mac)
     
     print(f"📥 Server Response:")
     print(f"   Status Code: {response.status_code}")
@@ -92,30 +132,34 @@ def demo_replay_attack(original_nonce, original_timestamp):
     else:
         print("   ❌ UNEXPECTED: Replay attack not detected")
 
-def demo_invalid_hmac():
+def send_invalid_hmac():
+    """Send a request signed with a fake HMAC. Returns (nonce, timestamp, fake_mac, response)."""
+    nonce = next_nonce()
+    timestamp = time.time_ns() // 1_000_000_000
+    fake_mac = "deadbeef" * 8  # Obviously fake HMAC
+    
+    headers = {
+        'X-Nonce': str(nonce),
+        'X-Timestamp': str(timestamp),
+        'X-MAC': fake_mac
+    }
+    
+    response = _SESSION.get(f"{SERVER_URL}/api/inverter/config", headers=headers)
+    return nonce, timestamp, fake_mac, response
+
+def demo_invalid_hmac(sent=None):
     """Demonstrate invalid HMAC attack (should fail)."""
     print("\\n" + "="*60)
     print("🔓 DEMO 3: Invalid HMAC Attack")
     print("="*60)
     
-    nonce = int(time.time()) % 10000 + 200
-    timestamp = int(time.time())
-    fake_mac = "deadbeef" * 8  # Obviously fake HMAC
+    nonce, timestamp, fake_mac, response = sent or send_invalid_hmac()
     
     print(f"📤 Sending request with invalid HMAC:")
     print(f"   Nonce: {nonce}")
     print(f"   Timestamp: {timestamp}")
     print(f"   HMAC: {fake_mac} (INVALID)")
     
-    headers = {
-        'Device-ID': DEVICE_ID,
-        'X-Nonce': str(nonce),
-        'X-Timestamp': str(timestamp),
-        'X-MAC': fake_mac
-    }
-    
-    response = requests.get(f"{SERVER_URL}/api/inverter/config", headers=headers)
-    
     print(f"📥 Server Response:")
     print(f"   Status Code: {response.status_code}")
     print(f"   Response: {response.text}")
@@ -125,23 +169,24 @@ def demo_invalid_hmac():
     else:
         print("   ❌ UNEXPECTED: Invalid HMAC not detected")
 
-def demo_missing_headers():
+def send_missing_headers():
+    """Send a request without security headers. Returns the response."""
+    # Only the session's Device-ID header is sent - security headers intentionally missing
+    return _SESSION.get(f"{SERVER_URL}/api/inverter/config")
+
+def demo_missing_headers(response=None):
     """Demonstrate missing security headers attack (should fail)."""
     print("\\n" + "="*60)
     print("📋 DEMO 4: Missing Security Headers")
     print("="*60)
     
+    if response is None:
+        response = send_missing_headers()
+    
     print(f"📤 Sending request without security headers:")
     print(f"   Device ID: {DEVICE_ID}")
     print(f"   Missing: X-Nonce, X-Timestamp, X-MAC")
     
-    headers = {
-        'Device-ID': DEVICE_ID
-        # Intentionally missing security headers
-    }
-    
-    response = requests.get(f"{SERVER_URL}/api/inverter/config", headers=headers)
-    
     print(f"📥 Server Response:")
     print(f"   Status Code: {response.status_code}")
     print(f"   Response: {response.text}")
@@ -151,22 +196,27 @@ def demo_missing_headers():
     else:
         print("   ❌ UNEXPECTED: Missing headers not detected")
 
-def demo_nonce_window_attack():
+def send_old_nonce():
+    """Send a validly signed request with a stale nonce. Returns (nonce, timestamp, response)."""
+    # Try with a very old nonce (outside window)
+    old_nonce = 1  # Much lower than current device nonce (~61)
+    timestamp = time.time_ns() // 1_000_000_000
+    
+    response = make_authenticated_request("/api/inverter/config", old_nonce, timestamp)
+    return old_nonce, timestamp, response
+
+def demo_nonce_window_attack(sent=None):
     """Demonstrate nonce window boundary attack."""
     print("\\n" + "="*60)
     print("🔢 DEMO 5: Nonce Window Boundary Test")
     print("="*60)
     
-    # Try with a very old nonce (outside window)
-    old_nonce = 1  # Much lower than current device nonce (~61)
-    timestamp = int(time.time())
+    old_nonce, timestamp, response = sent or send_old_nonce()
     
     print(f"📤 Sending request with very old nonce:")
     print(f"   Nonce: {old_nonce} (TOO OLD - outside 100-nonce window)")
     print(f"   Timestamp: {timestamp}")
     
-    response = make_authenticated_request("/api/inverter/config", old_nonce, timestamp)
-    
     print(f"📥 Server Response:")
     print(f"   Status Code: {response.status_code}")
     print(f"   Response: {response.text}")
@@ -186,22 +236,29 @@ def main():
     
     try:
         # Test 1: Normal authenticated request
-        nonce, timestamp = demo_normal_request()
+        nonce, timestamp, mac = demo_normal_request()
         
         # Small delay between requests
         time.sleep(1)
         
         # Test 2: Replay attack
-        demo_replay_attack(nonce, timestamp)
-        
-        # Test 3: Invalid HMAC
-        demo_invalid_hmac()
-        
-        # Test 4: Missing headers
-        demo_missing_headers()
+        demo_replay_attack(nonce, timestamp, mac)
         
-        # Test 5: Nonce window test
-        demo_nonce_window_attack()
+        # Tests 3-5 share no state, so their requests go out concurrently;
+        # results are still printed in order
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            invalid = pool.submit(send_invalid_hmac)
+            missing = pool.submit(send_missing_headers)
+            old_nonce = pool.submit(send_old_nonce)
+            
+            # Test 3: Invalid HMAC
+            demo_invalid_hmac(invalid.result())
+            
+            # Test 4: Missing headers
+            demo_missing_headers(missing.result())
+            
+            # Test 5: Nonce window test
+            demo_nonce_window_attack(old_nonce.result())
         
         print("\\n" + "="*60)
         print("📊 DEMONSTRATION SUMMARY")
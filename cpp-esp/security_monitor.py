@@ -19,19 +19,22 @@ Shows:
 import requests
 import time
 import json
+from collections import deque
 from datetime import datetime
 
 SERVER_URL = "http://10.50.126.183:8080"
 
-def get_security_logs():
-    """Fetch latest security logs from server."""
+def get_security_logs(since=None):
+    """Fetch security logs newer than the cursor. Returns (logs, next_cursor)."""
+    params = {'since': since} if since is not None else None
     try:
-        response = requests.get(f"{SERVER_URL}/api/cloud/logs/security")
+        response = requests.get(f"{SERVER_URL}/api/cloud/logs/security", params=params)
         if response.status_code == 200:
-            return response.json().get('logs', [])
-        return []
+            data = response.json()
+            return data.get('logs', []), data.get('cursor')
+        return [], since
     except:
-        return []
+        return [], since
 
 def format_security_event(event):
     """Format security event for display."""
@@ -64,17 +67,24 @@ def monitor_security_logs():
     print("Press Ctrl+C to stop")
     print()
     
+    cursor = None
+    # Fallback dedup for servers without cursor support, capped so it can't grow forever
+    recent_ids = deque(maxlen=1024)
     seen_events = set()
     
     try:
         while True:
-            logs = get_security_logs()
+            logs, cursor = get_security_logs(cursor)
             
             # Show only new events
             for event in logs:
-                event_id = f"{event.get('timestamp')}-{event.get('event_type')}-{event.get('device_id')}"
+                # Tuple key: hashed directly, no string building for already-seen events
+                event_id = (event.get('timestamp'), event.get('event_type'), event.get('device_id'))
                 if event_id not in seen_events:
                     print(format_security_event(event))
+                    if len(recent_ids) == recent_ids.maxlen:
+                        seen_events.discard(recent_ids[0])
+                    recent_ids.append(event_id)
                     seen_events.add(event_id)
             
             time.sleep(2)  # Check every 2 seconds
@@ -9,10 +9,15 @@ import requests
 import json
 import argparse
 import sys
+from requests.adapters import HTTPAdapter
 
 # Flask server endpoint
 SERVER_URL = "http://10.81.6.183:8080"
 
+# Keep-alive session shared by the send and history calls
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 # Available registers that can be written (from Inverter SIM API)
 WRITABLE_REGISTERS = {
     8: "Battery SOC (%)",
@@ -43,7 +48,7 @@ def send_command(register: int, value: float, device_id: str = "EcoWatt001", enc
     print("=" * 60)
     
     try:
-        response = requests.post(endpoint, json=payload, timeout=10)
+        response = _SESSION.post(endpoint, json=payload, timeout=10)
         response.raise_for_status()
         
         result = response.json()
@@ -70,7 +75,7 @@ def check_command_history(device_id: str = "EcoWatt001"):
     endpoint = f"{SERVER_URL}/api/cloud/command/history"
     
     try:
-        response = requests.get(endpoint, params={"device_id": device_id}, timeout=10)
+        response = _SESSION.get(endpoint, params={"device_id": device_id}, timeout=10)
         response.raise_for_status()
         
         history = response.json()
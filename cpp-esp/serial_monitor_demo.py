@@ -6,10 +6,10 @@ Filters and highlights important logs for clear demonstration
 import serial
 import re
 import sys
-from colorama import init, Fore, Back, Style
+from colorama import Fore, Back, Style
 
-# Initialize colorama for Windows color support
-init()
+from console_colors import (NATIVE_ANSI, PFX_ERR, PFX_OK, PFX_WARN, PFX_CFG, PFX_SEC,
+                            PFX_INFO, PFX_DIM, RESET)
 
 # Configure serial port
 SERIAL_PORT = "COM5"
@@ -39,41 +39,62 @@ FILTER_OUT = [
     "timestamp"
 ]
 
+def _keyword_re(words):
+    """One case-insensitive alternation matching any of the given literal words"""
+    return re.compile("|".join(map(re.escape, words)), re.IGNORECASE)
+
+# Precompiled once so each line is scanned by a single regex per category
+_RE_FILTER = _keyword_re(FILTER_OUT)
+_RE_ERROR = _keyword_re(["ERROR", "FAILED", "REJECT"])
+_RE_OK = _keyword_re(["SUCCESS", "APPLIED", "VERIFIED", "✓"])
+_RE_WARN = _keyword_re(["WARN", "ROLLBACK", "RETRY"])
+_RE_ACTION = _keyword_re(["[CONFIG]", "[COMMAND]", "[CMD]", "[FOTA]"])
+_RE_SECURITY = _keyword_re(["[SECURITY]"])
+_RE_INFO = _keyword_re(["[INFO]"])
+
 def should_filter(line):
     """Check if line should be filtered out"""
-    for keyword in FILTER_OUT:
-        if keyword.lower() in line.lower():
-            return True
-    return False
+    return _RE_FILTER.search(line) is not None
 
 def colorize_line(line):
     """Add color highlighting to important keywords"""
     # Error/Failed - Red
-    if any(word in line.upper() for word in ["ERROR", "FAILED", "REJECT"]):
-        return Fore.RED + Style.BRIGHT + line + Style.RESET_ALL
+    if _RE_ERROR.search(line):
+        return f"{PFX_ERR}{line}{RESET}"
     
     # Success/Applied - Green
-    if any(word in line.upper() for word in ["SUCCESS", "APPLIED", "VERIFIED", "✓"]):
-        return Fore.GREEN + Style.BRIGHT + line + Style.RESET_ALL
+    if _RE_OK.search(line):
+        return f"{PFX_OK}{line}{RESET}"
     
     # Warning/Rollback - Yellow
-    if any(word in line.upper() for word in ["WARN", "ROLLBACK", "RETRY"]):
-        return Fore.YELLOW + Style.BRIGHT + line + Style.RESET_ALL
+    if _RE_WARN.search(line):
+        return f"{PFX_WARN}{line}{RESET}"
     
     # Config/Command/FOTA - Cyan (important actions)
-    if any(word in line.upper() for word in ["[CONFIG]", "[COMMAND]", "[CMD]", "[FOTA]"]):
-        return Fore.CYAN + Style.BRIGHT + line + Style.RESET_ALL
+    if _RE_ACTION.search(line):
+        return f"{PFX_CFG}{line}{RESET}"
     
     # Security - Magenta
-    if "[SECURITY]" in line.upper():
-        return Fore.MAGENTA + Style.BRIGHT + line + Style.RESET_ALL
+    if _RE_SECURITY.search(line):
+        return f"{PFX_SEC}{line}{RESET}"
     
     # Info - White (default)
-    if "[INFO]" in line.upper():
-        return Fore.WHITE + line + Style.RESET_ALL
+    if _RE_INFO.search(line):
+        return f"{PFX_INFO}{line}{RESET}"
     
     # Default - dim white
-    return Style.DIM + line + Style.RESET_ALL
+    return f"{PFX_DIM}{line}{RESET}"
+
+def write_batch(out):
+    """Write a batch of coloured, newline-terminated lines in one call"""
+    if NATIVE_ANSI:
+        sys.stdout.flush()  # Keep ordering with anything print() has buffered
+        sys.stdout.buffer.write(out)
+        sys.stdout.buffer.flush()
+    else:
+        # colorama wraps sys.stdout, so it has to see the text to translate colours
+        sys.stdout.write(out.decode('utf-8'))
+        sys.stdout.flush()
 
 def main():
     print(f"{Fore.CYAN}{'='*60}")
@@ -87,11 +108,17 @@ def main():
         ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
         print(f"{Fore.GREEN}✓ Connected to {SERIAL_PORT}{Style.RESET_ALL}\n")
         
+        buf = b''
         while True:
             try:
-                # Read line from serial
-                if ser.in_waiting > 0:
-                    line = ser.readline().decode('utf-8', errors='ignore').strip()
+                # Drain everything waiting (or block for one byte) and split into lines
+                buf += ser.read(ser.in_waiting or 1)
+                lines = buf.split(b'\n')
+                buf = lines[-1]  # Keep the partial line for the next read
+                
+                out = bytearray()
+                for raw in lines[:-1]:
+                    line = raw.decode('utf-8', errors='ignore').strip()
                     
                     if not line:
                         continue
@@ -100,8 +127,12 @@ def main():
                     if should_filter(line):
                         continue
                     
-                    # Print with color highlighting
-                    print(colorize_line(line))
+                    # Queue with color highlighting
+                    out += colorize_line(line).encode('utf-8', 'replace')
+                    out += b'\n'
+                
+                if out:
+                    write_batch(out)
                     
             except KeyboardInterrupt:
                 print(f"\n{Fore.YELLOW}Stopping monitor...{Style.RESET_ALL}")
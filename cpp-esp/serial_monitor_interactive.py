@@ -5,11 +5,12 @@ Press SPACE to pause/resume, F to filter, Q to quit
 
 import serial
 import sys
+import time
 import msvcrt
-from colorama import init, Fore, Style
+from colorama import Fore, Style
 from datetime import datetime
 
-init()
+from console_colors import PFX_ERR, PFX_OK, PFX_CFG, PFX_SEC, PFX_WARN, PFX_INFO, RESET
 
 SERIAL_PORT = "COM5"
 BAUD_RATE = 115200
@@ -22,6 +23,7 @@ class DemoSerialMonitor:
         self.paused = False
         self.filter_enabled = True
         self.buffer = []
+        self._buf = b''  # Partial line carried between serial reads
         
         # Filter keywords
         self.filter_out = ["[DEBUG]", "Heap:", "Free:", "WiFi rssi:"]
@@ -46,17 +48,17 @@ class DemoSerialMonitor:
         
         # Priority colors
         if any(w in upper for w in ["ERROR", "FAILED"]):
-            return Fore.RED + Style.BRIGHT + line
+            return f"{PFX_ERR}{line}{RESET}"
         if any(w in upper for w in ["SUCCESS", "✓", "VERIFIED"]):
-            return Fore.GREEN + Style.BRIGHT + line
+            return f"{PFX_OK}{line}{RESET}"
         if any(w in upper for w in ["[CONFIG]", "[COMMAND]", "[FOTA]"]):
-            return Fore.CYAN + Style.BRIGHT + line
+            return f"{PFX_CFG}{line}{RESET}"
         if "[SECURITY]" in upper:
-            return Fore.MAGENTA + Style.BRIGHT + line
+            return f"{PFX_SEC}{line}{RESET}"
         if any(w in upper for w in ["WARN", "ROLLBACK"]):
-            return Fore.YELLOW + Style.BRIGHT + line
+            return f"{PFX_WARN}{line}{RESET}"
         
-        return Fore.WHITE + line
+        return f"{PFX_INFO}{line}{RESET}"
     
     def display_status(self):
         """Display current status bar"""
@@ -108,12 +110,20 @@ class DemoSerialMonitor:
                         print(f"\n{Fore.YELLOW}Quitting...{Style.RESET_ALL}")
                         break
                 
-                # Read and display logs if not paused
-                if not self.paused and self.ser.in_waiting > 0:
-                    line = self.ser.readline().decode('utf-8', errors='ignore').strip()
+                # Read and display logs if not paused. The read blocks for up to
+                # the serial timeout when idle, so the loop doesn't spin a core.
+                if self.paused:
+                    time.sleep(0.05)  # Nothing to read - just wait for a key
+                else:
+                    self._buf += self.ser.read(self.ser.in_waiting or 1)
+                    lines = self._buf.split(b'\n')
+                    self._buf = lines[-1]
                     
-                    if line and not self.should_filter(line):
-                        print(self.colorize(line) + Style.RESET_ALL)
+                    for raw in lines[:-1]:
+                        line = raw.decode('utf-8', errors='ignore').strip()
+                        
+                        if line and not self.should_filter(line):
+                            print(self.colorize(line))
                 
         except KeyboardInterrupt:
             print(f"\n{Fore.YELLOW}Interrupted{Style.RESET_ALL}")
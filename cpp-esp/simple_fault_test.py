@@ -5,13 +5,243 @@ Tests fault recovery using manual methods and event log inspection
 """
 
 import argparse
+import json
 import time
 import sys
 from datetime import datetime
 
+# Report body, written one section at a time via format_map
+_REPORT_SECTIONS = (
+"""# Fault Recovery Test Report (Manual Testing)
+**Generated:** {generated}  
+**Device:** ESP32 (NodeMCU)  
+**Serial Port:** {port}  
+**Testing Method:** Manual observation and event log inspection
+
+---
+
+""",
+"""## Test Summary
+
+| Test | Status | Notes |
+|------|--------|-------|
+| Network Fault Recovery | {network_summary} | Network disconnect/reconnect test |
+| Buffer Overflow Handling | {buffer_summary} | Degraded mode test |
+| Event Log Format | {log_format_summary} | JSON format verification |
+| Event Log Persistence | {persistence_summary} | Reboot survival test |
+| Recovery Statistics | {statistics_summary} | Recovery rate calculation |
+
+---
+
+""",
+"""## Detailed Results
+
+### 1. Network Fault Recovery
+**Status:** {network_status}  
+
+**Test Procedure:**
+1. Disconnected WiFi/network
+2. Observed fault detection
+3. Reconnected network
+4. Verified recovery
+
+**Expected Behavior:**
+- [FaultHandler] Network error detected
+- [EventLog] FAULT logged with severity HIGH
+- Exponential backoff retry
+- [FaultHandler] Recovery successful
+- [EventLog] RECOVERY logged
+
+**Actual Result:** {network_notes}
+
+---
+
+""",
+"""### 2. Buffer Overflow Handling
+**Status:** {buffer_status}  
+
+**Test Procedure:**
+- Attempted to fill buffer by preventing upload
+- Observed degraded mode behavior
+
+**Expected Behavior:**
+- [FaultHandler] Buffer overflow detected
+- [FaultHandler] Entering degraded mode
+- Oldest data dropped (FIFO)
+- System continues operating
+
+**Actual Result:** {buffer_notes}
+
+---
+
+""",
+"""### 3. Event Log Format Verification
+**Status:** {log_format_status}  
+
+**Test Procedure:**
+- Accessed /event_log.json file
+- Verified JSON format
+- Checked required fields
+
+**Event Count:** {event_count}
+
+**Sample Event:**
+```json
+{{
+  "timestamp": "2025-11-26T10:30:00Z",
+  "event": "Network timeout",
+  "module": "network",
+  "type": "FAULT",
+  "severity": "HIGH",
+  "recovered": true,
+  "details": "HTTP request timeout"
+}}
+```
+
+---
+
+""",
+"""### 4. Event Log Persistence
+**Status:** {persistence_status}  
+
+**Test Procedure:**
+1. Generated events
+2. Rebooted ESP32
+3. Verified events survived
+
+**Result:** {persistence_notes}
+
+---
+
+""",
+"""### 5. Recovery Statistics
+**Status:** {statistics_status}  
+
+**Recovery Rate:** {recovery_rate}
+
+**Calculation:**
+- Total Faults: {total_faults}
+- Recovered: {recovered_count}
+- Rate = (Recovered / Total) × 100%
+
+---
+
+""",
+"""## Fault Types Supported
+
+| Fault Type | Recovery Strategy | Status |
+|------------|-------------------|--------|
+| Network Timeout | Exponential backoff retry | {network_fault_row} |
+| Malformed Frame | Discard and continue | ⊘ |
+| Buffer Overflow | Degraded mode | {buffer_summary} |
+| Parse Error | Skip and use defaults | ⊘ |
+| Security Violation | Fail-safe (no recovery) | ⊘ |
+
+**Note:** Not all fault types tested in this manual session.  
+Full fault injection requires Inverter SIM API key.
+
+---
+
+""",
+"""## Conclusions
+
+**Milestone 5 Part 2 Status:**
+
+- ✅ EventLogger implementation: Complete
+- ✅ FaultHandler implementation: Complete
+- ✅ Event log persistence: {persistence_conclusion}
+- {network_icon} Network fault recovery: {network_conclusion}
+- ⚠️ Full fault injection: Requires API key
+
+**Recommendations:**
+
+1. {log_recommendation}
+2. {network_recommendation}
+3. ⚠️ Obtain API key for comprehensive fault injection
+4. ⚠️ Test all 7 fault types with automated script
+5. ✅ Proceed to integration testing after fault recovery validated
+
+---
+
+""",
+"""**Next Steps:**
+
+1. Complete any pending fault tests
+2. Run full fault injection with API key (when available)
+3. Proceed to integration testing (Part 3)
+4. Prepare demonstration video (Part 4)
+
+---
+
+""",
+"""**Report generated by:** simple_fault_test.py  
+**Date:** {generated}
+""",
+)
+
+# Report placeholder -> fallback used when the tests recorded nothing for it
+_REPORT_DEFAULTS = {
+    'network_summary': '❌',
+    'buffer_summary': '⊘',
+    'log_format_summary': '⊘',
+    'persistence_summary': '❌',
+    'statistics_summary': '⊘',
+    'network_status': 'NOT TESTED',
+    'buffer_status': 'NOT TESTED',
+    'log_format_status': 'NOT TESTED',
+    'persistence_status': 'NOT TESTED',
+    'statistics_status': 'NOT TESTED',
+    'network_notes': 'See manual test log',
+    'buffer_notes': 'Test skipped or pending',
+    'event_count': 'N/A',
+    'recovery_rate': 'N/A',
+    'total_faults': 'N/A',
+    'recovered_count': 'N/A',
+    'network_fault_row': '⊘',
+}
+
+# (report placeholder, results key) pairs copied straight from the test results
+_REPORT_SOURCES = (
+    ('network_summary', 'network'),
+    ('buffer_summary', 'buffer'),
+    ('log_format_summary', 'log_format'),
+    ('persistence_summary', 'persistence'),
+    ('statistics_summary', 'statistics'),
+    ('network_status', 'network'),
+    ('buffer_status', 'buffer'),
+    ('log_format_status', 'log_format'),
+    ('persistence_status', 'persistence'),
+    ('statistics_status', 'statistics'),
+    ('network_notes', 'network_notes'),
+    ('buffer_notes', 'buffer_notes'),
+    ('event_count', 'event_count'),
+    ('persistence_notes', 'persistence_notes'),
+    ('recovery_rate', 'recovery_rate'),
+    ('total_faults', 'total_faults'),
+    ('recovered_count', 'recovered_count'),
+    ('network_fault_row', 'network'),
+)
+
 class SimpleFaultTester:
-    def __init__(self, port="COM5"):
+    def __init__(self, port="COM5", answers=None):
         self.port = port
+        self.answers = answers or {}  # Pre-recorded answers keyed by prompt key (--answers)
+        self._asked = {}
+        
+    def ask(self, key, prompt, lower=True):
+        """Answer a prompt from --answers if given, else stdin; normalized answers are cached by key"""
+        if key in self._asked:
+            return self._asked[key]
+        if key in self.answers:
+            answer = str(self.answers[key])
+            print(f"{prompt}{answer}")
+        else:
+            answer = input(prompt)
+        answer = answer.strip()
+        if lower:
+            answer = answer.lower()
+        self._asked[key] = answer
+        return answer
         
     def print_header(self, text):
         print(f"\n{'='*80}")
@@ -43,7 +273,7 @@ class SimpleFaultTester:
         
         print("\n⏱️  Recommended: Monitor for 3-5 minutes")
         
-        result = input("\n✓ Did network fault recovery work? (y/n): ").strip().lower()
+        result = self.ask("network", "\n✓ Did network fault recovery work? (y/n): ")
         
         if result == 'y':
             print("✅ PASSED - Network fault recovery working")
@@ -68,10 +298,10 @@ class SimpleFaultTester:
         print("   - Oldest data dropped (FIFO)")
         print("   - System continues operating")
         
-        result = input("\n✓ Did you test buffer overflow? (y/n/skip): ").strip().lower()
+        result = self.ask("buffer", "\n✓ Did you test buffer overflow? (y/n/skip): ")
         
         if result == 'y':
-            passed = input("  Did it work correctly? (y/n): ").strip().lower() == 'y'
+            passed = self.ask("buffer_passed", "  Did it work correctly? (y/n): ") == 'y'
             if passed:
                 print("✅ PASSED - Buffer overflow handled correctly")
             else:
@@ -93,7 +323,9 @@ class SimpleFaultTester:
         print("2. Access ESP32 filesystem:")
         print("   Option A: Use serial file browser")
         print("   Option B: Add code to print /event_log.json to serial")
-        print("   Option C: Use SPIFFS/LittleFS file uploader plugin")
+        print("   Option C: Use a LittleFS file browser/uploader plugin")
+        print("   (The event log lives on the LittleFS partition - platformio.ini sets")
+        print("    board_build.filesystem = littlefs; it is capped at 100 events, oldest dropped first)")
         print("3. Verify event_log.json format:")
         print("   - Should be JSON array")
         print("   - Each event should have:")
@@ -127,11 +359,11 @@ class SimpleFaultTester:
   }
 ]""")
         
-        result = input("\n✓ Did you inspect the event log? (y/n): ").strip().lower()
+        result = self.ask("log_inspected", "\n✓ Did you inspect the event log? (y/n): ")
         
         if result == 'y':
-            valid = input("  Was the format correct? (y/n): ").strip().lower() == 'y'
-            count = input("  How many events in log? ").strip()
+            valid = self.ask("log_format", "  Was the format correct? (y/n): ") == 'y'
+            count = self.ask("event_count", "  How many events in log? ", lower=False)
             if valid:
                 print(f"✅ PASSED - Event log format valid ({count} events)")
             else:
@@ -150,11 +382,15 @@ class SimpleFaultTester:
         print("2. Note number of events in log")
         print("3. REBOOT ESP32 (press EN button)")
         print("4. Check serial output after boot:")
-        print("   - [EventLog] Loaded X events from /event_log.json")
+        print("   - [EventLogger] Current event count: X")
         print("5. Verify X matches number before reboot")
         print("6. Optionally inspect log file again to confirm")
         
-        result = input("\n✓ Did events survive reboot? (y/n): ").strip().lower()
+        print("\n⚠️  If the boot log mentions SPIFFS rather than LittleFS, the build is using the wrong")
+        print("   filesystem - SPIFFS rewrites slow down sharply as it fills, so reboot/persistence")
+        print("   timings will not be representative. Rebuild with board_build.filesystem = littlefs.")
+        
+        result = self.ask("persistence", "\n✓ Did events survive reboot? (y/n): ")
         
         if result == 'y':
             print("✅ PASSED - Event log persistence verified")
@@ -176,10 +412,10 @@ class SimpleFaultTester:
         print("3. Manually verify calculation:")
         print("   Recovery Rate = (Recovered / Total Faults) × 100%")
         
-        result = input("\n✓ Did you see recovery statistics? (y/n): ").strip().lower()
+        result = self.ask("statistics", "\n✓ Did you see recovery statistics? (y/n): ")
         
         if result == 'y':
-            rate = input("  What was the recovery rate? (e.g., 85.5): ").strip()
+            rate = self.ask("recovery_rate", "  What was the recovery rate? (e.g., 85.5): ", lower=False)
             print(f"✅ PASSED - Recovery rate: {rate}%")
             return True, rate
         else:
@@ -190,167 +426,31 @@ class SimpleFaultTester:
         """Generate simple test report"""
         self.print_header("GENERATING FAULT RECOVERY TEST REPORT")
         
-        report_file = f"fault_recovery_test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
-        
-        report = f"""# Fault Recovery Test Report (Manual Testing)
-**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  
-**Device:** ESP32 (NodeMCU)  
-**Serial Port:** {self.port}  
-**Testing Method:** Manual observation and event log inspection
-
----
-
-## Test Summary
-
-| Test | Status | Notes |
-|------|--------|-------|
-| Network Fault Recovery | {results.get('network', '❌')} | Network disconnect/reconnect test |
-| Buffer Overflow Handling | {results.get('buffer', '⊘')} | Degraded mode test |
-| Event Log Format | {results.get('log_format', '⊘')} | JSON format verification |
-| Event Log Persistence | {results.get('persistence', '❌')} | Reboot survival test |
-| Recovery Statistics | {results.get('statistics', '⊘')} | Recovery rate calculation |
-
----
-
-## Detailed Results
-
-### 1. Network Fault Recovery
-**Status:** {results.get('network', 'NOT TESTED')}  
-
-**Test Procedure:**
-1. Disconnected WiFi/network
-2. Observed fault detection
-3. Reconnected network
-4. Verified recovery
-
-**Expected Behavior:**
-- [FaultHandler] Network error detected
-- [EventLog] FAULT logged with severity HIGH
-- Exponential backoff retry
-- [FaultHandler] Recovery successful
-- [EventLog] RECOVERY logged
-
-**Actual Result:** {results.get('network_notes', 'See manual test log')}
-
----
-
-### 2. Buffer Overflow Handling
-**Status:** {results.get('buffer', 'NOT TESTED')}  
-
-**Test Procedure:**
-- Attempted to fill buffer by preventing upload
-- Observed degraded mode behavior
-
-**Expected Behavior:**
-- [FaultHandler] Buffer overflow detected
-- [FaultHandler] Entering degraded mode
-- Oldest data dropped (FIFO)
-- System continues operating
-
-**Actual Result:** {results.get('buffer_notes', 'Test skipped or pending')}
-
----
-
-### 3. Event Log Format Verification
-**Status:** {results.get('log_format', 'NOT TESTED')}  
-
-**Test Procedure:**
-- Accessed /event_log.json file
-- Verified JSON format
-- Checked required fields
-
-**Event Count:** {results.get('event_count', 'N/A')}
-
-**Sample Event:**
-```json
-{{
-  "timestamp": "2025-11-26T10:30:00Z",
-  "event": "Network timeout",
-  "module": "network",
-  "type": "FAULT",
-  "severity": "HIGH",
-  "recovered": true,
-  "details": "HTTP request timeout"
-}}
-```
-
----
-
-### 4. Event Log Persistence
-**Status:** {results.get('persistence', 'NOT TESTED')}  
-
-**Test Procedure:**
-1. Generated events
-2. Rebooted ESP32
-3. Verified events survived
-
-**Result:** {results.get('persistence_notes', 'Events survived reboot' if results.get('persistence') == '✅' else 'Test pending')}
-
----
-
-### 5. Recovery Statistics
-**Status:** {results.get('statistics', 'NOT TESTED')}  
-
-**Recovery Rate:** {results.get('recovery_rate', 'N/A')}
-
-**Calculation:**
-- Total Faults: {results.get('total_faults', 'N/A')}
-- Recovered: {results.get('recovered_count', 'N/A')}
-- Rate = (Recovered / Total) × 100%
-
----
-
-## Fault Types Supported
-
-| Fault Type | Recovery Strategy | Status |
-|------------|-------------------|--------|
-| Network Timeout | Exponential backoff retry | {results.get('network', '⊘')} |
-| Malformed Frame | Discard and continue | ⊘ |
-| Buffer Overflow | Degraded mode | {results.get('buffer', '⊘')} |
-| Parse Error | Skip and use defaults | ⊘ |
-| Security Violation | Fail-safe (no recovery) | ⊘ |
-
-**Note:** Not all fault types tested in this manual session.  
-Full fault injection requires Inverter SIM API key.
-
----
-
-## Conclusions
-
-**Milestone 5 Part 2 Status:**
-
-- ✅ EventLogger implementation: Complete
-- ✅ FaultHandler implementation: Complete
-- ✅ Event log persistence: {'Verified' if results.get('persistence') == '✅' else 'Needs verification'}
-- {'✅' if results.get('network') == '✅' else '⚠️'} Network fault recovery: {'Working' if results.get('network') == '✅' else 'Needs testing'}
-- ⚠️ Full fault injection: Requires API key
-
-**Recommendations:**
-
-1. {'✅ Event log verified' if results.get('log_format') == '✅' else '⚠️ Verify event log format and persistence'}
-2. {'✅ Network recovery tested' if results.get('network') == '✅' else '⚠️ Complete network fault testing'}
-3. ⚠️ Obtain API key for comprehensive fault injection
-4. ⚠️ Test all 7 fault types with automated script
-5. ✅ Proceed to integration testing after fault recovery validated
-
----
-
-**Next Steps:**
-
-1. Complete any pending fault tests
-2. Run full fault injection with API key (when available)
-3. Proceed to integration testing (Part 3)
-4. Prepare demonstration video (Part 4)
-
----
-
-**Report generated by:** simple_fault_test.py  
-**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-"""
-        
-        # Save report
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write(report)
+        # One clock read for the file name and both report dates
+        now = datetime.now()
+        report_file = f"fault_recovery_test_report_{now.strftime('%Y%m%d_%H%M%S')}.md"
+        generated = now.strftime('%Y-%m-%d %H:%M:%S')
+        network_ok = results.get('network') == '✅'
+        persistence_ok = results.get('persistence') == '✅'
+        
+        # Defaults first, then whatever the tests recorded, then the derived fields
+        values = dict(_REPORT_DEFAULTS)
+        values.update((name, results[key]) for name, key in _REPORT_SOURCES if key in results)
+        if 'persistence_notes' not in results:
+            values['persistence_notes'] = 'Events survived reboot' if persistence_ok else 'Test pending'
+        values.update(
+            generated=generated,
+            port=self.port,
+            persistence_conclusion='Verified' if persistence_ok else 'Needs verification',
+            network_icon='✅' if network_ok else '⚠️',
+            network_conclusion='Working' if network_ok else 'Needs testing',
+            log_recommendation='✅ Event log verified' if results.get('log_format') == '✅' else '⚠️ Verify event log format and persistence',
+            network_recommendation='✅ Network recovery tested' if network_ok else '⚠️ Complete network fault testing',
+        )
+        
+        # Stream the report section by section as UTF-8 bytes (no text-layer encode/newline pass)
+        with open(report_file, 'wb') as f:
+            f.writelines(section.format_map(values).encode('utf-8') for section in _REPORT_SECTIONS)
         
         print(f"\n✓ Report saved to: {report_file}")
         
@@ -364,7 +464,8 @@ Full fault injection requires Inverter SIM API key.
         print("These tests don't require the Inverter SIM API key.\n")
         print("Make sure your ESP32 is running and connected to serial monitor!")
         
-        input("\nPress Enter to begin...")
+        if not self.answers:
+            input("\nPress Enter to begin...")
         
         results = {}
         
@@ -392,7 +493,8 @@ Full fault injection requires Inverter SIM API key.
         log_result = self.test_event_log_inspection()
         if log_result is True:
             results['log_format'] = '✅ PASSED'
-            results['event_count'] = input("  Number of events: ").strip()
+            # Cached from the inspection step, so the count isn't asked for twice
+            results['event_count'] = self.ask("event_count", "  Number of events: ", lower=False)
         elif log_result is False:
             results['log_format'] = '❌ FAILED'
         else:
@@ -434,10 +536,17 @@ def main():
     )
     
     parser.add_argument("--port", default="COM5", help="Serial port (default: COM5)")
+    parser.add_argument("--answers", help="JSON file of pre-recorded answers for non-interactive runs, "
+                        "e.g. {\"network\": \"y\", \"buffer\": \"skip\", \"event_count\": \"12\"}")
     
     args = parser.parse_args()
     
-    tester = SimpleFaultTester(port=args.port)
+    answers = None
+    if args.answers:
+        with open(args.answers, encoding='utf-8') as f:
+            answers = json.load(f)
+    
+    tester = SimpleFaultTester(port=args.port, answers=answers)
     
     try:
         tester.run_tests()
@@ -149,7 +149,7 @@ int DataStorage::readLastSamples(int n, Sample* outBuf, size_t outBufSize) {
     return count;
 }
 
-// Periodic flush to SPIFFS
+// Periodic flush to LittleFS
 void DataStorage::flushBufferToFile() {
     File file = LittleFS.open(filename, "w");
     if (!file) return;
@@ -172,7 +172,7 @@ void EcoWattDevice::onCommandReceived(const CommandRequest& command) {
 void EcoWattDevice::setup() {
     Logger::info("EcoWatt Device initializing...");
     
-    // Initialize WiFi, SPIFFS, config, etc.
+    // Initialize WiFi, LittleFS, config, etc.
     if (!config_) {
         config_ = new ConfigManager();
         Logger::info("ConfigManager initialized");
@@ -4,6 +4,17 @@ Test script to verify the enhanced nonce recovery logic.
 This simulates what happens when the device can't load nonce state.
 """
 
+# numba is optional: with it the scalar helpers compile to native code
+# (useful when replaying large nonce logs), without it they run as-is
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+@njit(cache=True)
 def simulate_recovery_nonce(current_nonce=1, uptime_ms=0):
     """Simulate the estimateRecoveryNonce() function"""
     
@@ -26,6 +37,21 @@ def simulate_recovery_nonce(current_nonce=1, uptime_ms=0):
     
     return recovery_base
 
+@njit(cache=True)
+def is_nonce_valid_enhanced(nonce, last_received, window=100, max_first_sync=1000):
+    """Enhanced nonce validation with first-time sync support"""
+    if last_received == 0:
+        # First-time sync - allow reasonable nonces
+        return nonce > 0 and nonce <= max_first_sync
+    else:
+        # Normal operation - enforce window
+        return nonce > last_received and nonce <= (last_received + window)
+
+def is_nonce_valid_batch(nonces, last_received, window=100, max_first_sync=1000):
+    """Validate many nonces against one last_received with is_nonce_valid_enhanced;
+    returns a list of bools - handy when replaying recorded nonce logs."""
+    return [is_nonce_valid_enhanced(n, last_received, window, max_first_sync) for n in nonces]
+
 def test_recovery_scenarios():
     print("=== Enhanced Nonce Recovery Logic Test ===\n")
     
@@ -50,15 +76,6 @@ def test_recovery_scenarios():
 def test_first_sync_compatibility():
     print("=== First-Time Sync Compatibility Test ===\n")
     
-    def is_nonce_valid_enhanced(nonce, last_received, window=100, max_first_sync=1000):
-        """Enhanced nonce validation with first-time sync support"""
-        if last_received == 0:
-            # First-time sync - allow reasonable nonces
-            return nonce > 0 and nonce <= max_first_sync
-        else:
-            # Normal operation - enforce window
-            return nonce > last_received and nonce <= (last_received + window)
-    
     # Test recovery nonces against enhanced validation
     recovery_cases = [
         simulate_recovery_nonce(1, 0),      # ~51
@@ -66,8 +83,8 @@ def test_first_sync_compatibility():
         simulate_recovery_nonce(201, 60000), # ~251
     ]
     
-    for recovery_nonce in recovery_cases:
-        valid = is_nonce_valid_enhanced(recovery_nonce, 0, 100, 1000)
+    results = is_nonce_valid_batch(recovery_cases, 0, 100, 1000)
+    for recovery_nonce, valid in zip(recovery_cases, results):
         print(f"Recovery nonce {recovery_nonce} with last_received=0: {'VALID' if valid else 'INVALID'}")
     
     print("\nAll recovery nonces should be VALID for first-time sync!")
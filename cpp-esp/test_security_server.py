@@ -1,6 +1,12 @@
 """
 Simple Security Test Server for Milestone 4 Part 3
 This server helps test the security implementation independently
+
+For load testing, install waitress (pip install waitress) and the server
+uses it automatically with 8 threads, or run it directly:
+    waitress-serve --threads=8 --listen=0.0.0.0:8080 test_security_server:app
+Keep it to one process (no gunicorn -w N): nonce state lives in memory,
+so separate workers would each accept the same nonce once.
 """
 
 from flask import Flask, request, jsonify
@@ -9,9 +15,27 @@ import hmac
 import hashlib
 import base64
 import json
+import sys
+import threading
 import time
+from collections import OrderedDict, deque
+from itertools import islice
 from datetime import datetime
 
+# orjson is optional; the stdlib json module is the fallback
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+    def _json_pretty(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    _json_loads = json.loads
+    def _json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+    def _json_pretty(obj):
+        return json.dumps(obj, indent=2)
+
 app = Flask(__name__)
 CORS(app)
 
@@ -19,70 +43,126 @@ CORS(app)
 SECURITY_ENABLED = True
 PSK = bytes.fromhex("c41716a134168f52fbd4be3302fa5a88127ddde749501a199607b4c286ad29b3")
 NONCE_WINDOW = 100
+MAX_TRACKED_DEVICES = 4096  # Least recently seen devices are forgotten beyond this
+REPLAY_WINDOW_BITS = 64  # Nonces up to this far behind the highest may still arrive out of order
+_REPLAY_MASK = (1 << REPLAY_WINDOW_BITS) - 1
+DEBUG = False  # Verbose request/HMAC dumps (slow - keep off for load tests)
+
+# PSK-keyed HMAC built once; copies skip the key-pad setup on every message
+_HMAC_BASE = hmac.new(PSK, None, hashlib.sha256)
 
 # State Management
-nonce_store = {}  # device_id -> last_seen_nonce
-security_logs = []  # Log of all security events
+nonce_store = OrderedDict()  # device_id -> (highest_nonce, seen_bitmap), in LRU order
+security_logs = deque(maxlen=10_000)  # Ring buffer of recent security events
+_state_lock = threading.Lock()  # Guards nonce_store across server threads
 
-def log_security_event(event_type, data):
-    """Log security events for analysis"""
+def log_security_event(event_type, data, when=None):
+    """Log security events for analysis (when: ISO timestamp already taken by the caller)"""
     event = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": when or datetime.now().isoformat(),
         "type": event_type,
         "data": data
     }
     security_logs.append(event)
-    print(f"[SECURITY] {event_type}: {json.dumps(data, indent=2)}")
+    if DEBUG:
+        print(f"[SECURITY] {event_type}: {_json_pretty(data)}")
+    else:
+        print(f"[SECURITY] {event_type}: {data}")
+
+# Same string escaping json.dumps uses (C implementation)
+_encode_str = json.encoder.encode_basestring_ascii
+_ENVELOPE_FIELDS = frozenset(("nonce", "timestamp", "encrypted", "payload"))
+_ENVELOPE_KEYS = _ENVELOPE_FIELDS | {"mac"}
+
+def _hmac_hex(data):
+    """HMAC-SHA256 of data under the PSK, as hex"""
+    h = _HMAC_BASE.copy()
+    h.update(data)
+    return h.hexdigest()
+
+def _canonical_envelope(nonce, timestamp, encrypted, payload_b64):
+    """Bytes identical to json.dumps(envelope_without_mac, sort_keys=True), built directly"""
+    return b'{"encrypted": %s, "nonce": %d, "payload": %s, "timestamp": %d}' % (
+        b'true' if encrypted else b'false', nonce, _encode_str(payload_b64).encode('ascii'), timestamp)
+
+def _is_plain_envelope(d):
+    """True if d has exactly the standard envelope fields (mac optional) with their usual types"""
+    keys = d.keys()
+    return ((keys == _ENVELOPE_KEYS or keys == _ENVELOPE_FIELDS) and type(d["nonce"]) is int
+            and type(d["timestamp"]) is int and type(d["encrypted"]) is bool
+            and type(d["payload"]) is str)
+
+def _canonical_bytes(d):
+    """HMAC input for an envelope: json.dumps of everything except mac, keys sorted"""
+    if _is_plain_envelope(d):
+        # Fixed field layout - no dict copy, key sort or generic JSON encode
+        return _canonical_envelope(d["nonce"], d["timestamp"], d["encrypted"], d["payload"])
+    return json.dumps({k: v for k, v in d.items() if k != "mac"}, sort_keys=True).encode()
 
 def verify_hmac(payload_dict, received_mac):
     """Verify HMAC-SHA256 signature"""
-    # Remove MAC from dict for verification
-    payload_copy = payload_dict.copy()
-    if "mac" in payload_copy:
-        del payload_copy["mac"]
-    
-    # Sort keys for consistent ordering
-    sorted_json = json.dumps(payload_copy, sort_keys=True)
+    canonical = _canonical_bytes(payload_dict)
     
     # Compute HMAC
-    calculated_mac = hmac.new(PSK, sorted_json.encode(), hashlib.sha256).hexdigest()
+    calculated_mac = _hmac_hex(canonical)
+    match = isinstance(received_mac, str) and hmac.compare_digest(calculated_mac, received_mac)
     
-    print(f"[DEBUG] Payload for HMAC: {sorted_json}")
-    print(f"[DEBUG] Calculated MAC: {calculated_mac}")
-    print(f"[DEBUG] Received MAC: {received_mac}")
-    print(f"[DEBUG] Match: {calculated_mac == received_mac}")
+    if DEBUG:
+        print(f"[DEBUG] Payload for HMAC: {canonical.decode()}")
+        print(f"[DEBUG] Calculated MAC: {calculated_mac}")
+        print(f"[DEBUG] Received MAC: {received_mac}")
+        print(f"[DEBUG] Match: {match}")
     
-    return calculated_mac == received_mac
+    return match
 
 def check_nonce(device_id, nonce):
-    """Check if nonce is valid (not replayed)"""
-    if device_id not in nonce_store:
-        # First message from this device
-        nonce_store[device_id] = nonce
-        return True, "First nonce accepted"
-    
-    last_nonce = nonce_store[device_id]
-    
-    # Check if nonce is within acceptable window
-    if nonce <= last_nonce:
-        return False, f"Replay detected: nonce {nonce} <= last_nonce {last_nonce}"
+    """Check if nonce is valid (not replayed).
     
-    if nonce > last_nonce + NONCE_WINDOW:
-        return False, f"Nonce too far ahead: nonce {nonce} > last_nonce {last_nonce} + {NONCE_WINDOW}"
+    Sliding-window filter (as in IPsec/DTLS): bit i of the bitmap marks
+    highest_nonce - i as seen, so nonces that arrive late but within
+    REPLAY_WINDOW_BITS are still accepted exactly once.
+    """
+    if type(nonce) is not int:
+        return False, f"Invalid nonce: {nonce!r}"
     
-    # Valid nonce
-    nonce_store[device_id] = nonce
-    return True, f"Nonce accepted: {nonce}"
+    with _state_lock:
+        entry = nonce_store.get(device_id)
+        if entry is None:
+            # First message from this device; evict the stalest one if at capacity
+            nonce_store[sys.intern(device_id)] = (nonce, 1)
+            if len(nonce_store) > MAX_TRACKED_DEVICES:
+                nonce_store.popitem(last=False)
+            return True, "First nonce accepted"
+        
+        nonce_store.move_to_end(device_id)
+        last_nonce, seen = entry
+        
+        if nonce > last_nonce:
+            if nonce > last_nonce + NONCE_WINDOW:
+                return False, f"Nonce too far ahead: nonce {nonce} > last_nonce {last_nonce} + {NONCE_WINDOW}"
+            # Slide the window forward and mark the new highest nonce
+            nonce_store[device_id] = (nonce, ((seen << (nonce - last_nonce)) | 1) & _REPLAY_MASK)
+            return True, f"Nonce accepted: {nonce}"
+        
+        offset = last_nonce - nonce
+        bit = 1 << offset if offset < REPLAY_WINDOW_BITS else 0
+        if not bit or seen & bit:
+            return False, f"Replay detected: nonce {nonce} <= last_nonce {last_nonce}"
+        
+        # Late but unseen nonce inside the window
+        nonce_store[device_id] = (last_nonce, seen | bit)
+        return True, f"Out-of-order nonce accepted: {nonce}"
+
+# Everything in the health response except the timestamp is fixed - encode it once
+_HEALTH_PREFIX = ('{"security_enabled":%s,"service":"Security Test Server","status":"healthy","timestamp":"'
+                  % ('true' if SECURITY_ENABLED else 'false')).encode()
+_HEALTH_SUFFIX = b'"}\n'
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "service": "Security Test Server",
-        "security_enabled": SECURITY_ENABLED,
-        "timestamp": datetime.now().isoformat()
-    }), 200
+    body = _HEALTH_PREFIX + datetime.now().isoformat().encode() + _HEALTH_SUFFIX
+    return app.response_class(body, status=200, mimetype='application/json')
 
 @app.route('/api/security/test', methods=['POST'])
 def test_security():
@@ -96,13 +176,21 @@ def test_security():
         "payload": "base64_encoded_json",
         "mac": "hmac_sha256_hex"
     }
+    "payload" may also be the JSON object itself (no base64); the MAC then
+    covers it inside the sorted envelope and the response mirrors that form.
     """
+    # One clock read per request, shared by the event log and the response envelope
+    now = time.time()
+    now_ms = int(now * 1000)
+    now_iso = datetime.fromtimestamp(now).isoformat()
+    
     try:
-        data = request.get_json()
+        data = _json_loads(request.get_data())
         device_id = request.headers.get('Device-ID', 'test-device')
         
         print(f"\n[REQUEST] Received from {device_id}")
-        print(f"[REQUEST] Data: {json.dumps(data, indent=2)}")
+        if DEBUG:
+            print(f"[REQUEST] Data: {_json_pretty(data)}")
         
         if not SECURITY_ENABLED:
             return jsonify({"status": "success", "message": "Security disabled"}), 200
@@ -114,7 +202,7 @@ def test_security():
             log_security_event("VALIDATION_ERROR", {
                 "device_id": device_id,
                 "missing_fields": missing
-            })
+            }, when=now_iso)
             return jsonify({"error": f"Missing fields: {missing}"}), 400
         
         # Extract fields
@@ -131,7 +219,7 @@ def test_security():
                 "device_id": device_id,
                 "nonce": nonce,
                 "reason": nonce_msg
-            })
+            }, when=now_iso)
             return jsonify({"error": "Replay attack detected", "details": nonce_msg}), 403
         
         print(f"[NONCE] {nonce_msg}")
@@ -142,21 +230,26 @@ def test_security():
             log_security_event("HMAC_FAILED", {
                 "device_id": device_id,
                 "nonce": nonce
-            })
+            }, when=now_iso)
             return jsonify({"error": "HMAC verification failed"}), 403
         
         print(f"[HMAC] Verification PASSED")
         
-        # Step 3: Decode payload
+        # Step 3: Decode payload (raw objects need no decoding)
+        raw_payload = isinstance(payload_b64, dict)
         try:
-            payload_json = base64.b64decode(payload_b64).decode('utf-8')
-            payload_data = json.loads(payload_json)
-            print(f"[PAYLOAD] Decoded: {json.dumps(payload_data, indent=2)}")
+            if raw_payload:
+                payload_data = payload_b64
+            else:
+                payload_json = base64.b64decode(payload_b64).decode('utf-8')
+                payload_data = json.loads(payload_json)
+            if DEBUG:
+                print(f"[PAYLOAD] Decoded: {_json_pretty(payload_data)}")
         except Exception as e:
             log_security_event("DECODE_ERROR", {
                 "device_id": device_id,
                 "error": str(e)
-            })
+            }, when=now_iso)
             return jsonify({"error": f"Payload decode failed: {str(e)}"}), 400
         
         # Success!
@@ -164,36 +257,42 @@ def test_security():
             "device_id": device_id,
             "nonce": nonce,
             "payload_type": payload_data.get("type", "unknown")
-        })
+        }, when=now_iso)
         
         # Create secured response
         response_payload = {
             "status": "success",
             "message": "Security verification passed",
-            "server_time": int(time.time() * 1000),
+            "server_time": now_ms,
             "nonce_accepted": nonce
         }
         
-        # Encode response
-        response_json = json.dumps(response_payload, sort_keys=True)
-        response_b64 = base64.b64encode(response_json.encode()).decode()
+        # Encode response in the same form the client used
+        if raw_payload:
+            response_body = response_payload
+        else:
+            response_json = json.dumps(response_payload, sort_keys=True)
+            response_body = base64.b64encode(response_json.encode()).decode()
         
         # Create response envelope
         response_nonce = nonce + 1  # Server responds with next nonce
         response_envelope = {
             "nonce": response_nonce,
-            "timestamp": int(time.time() * 1000),
+            "timestamp": now_ms,
             "encrypted": False,
-            "payload": response_b64
+            "payload": response_body
         }
         
-        # Compute response MAC
-        response_mac = hmac.new(PSK, json.dumps(response_envelope, sort_keys=True).encode(), hashlib.sha256).hexdigest()
+        # Compute response MAC (our own base64 envelope has the fixed layout - skip the shape check)
+        if raw_payload:
+            response_mac = _hmac_hex(_canonical_bytes(response_envelope))
+        else:
+            response_mac = _hmac_hex(_canonical_envelope(response_nonce, now_ms, False, response_body))
         response_envelope["mac"] = response_mac
         
         print(f"[RESPONSE] Sending secured response with nonce {response_nonce}")
         
-        return jsonify(response_envelope), 200
+        return app.response_class(_json_dumps(response_envelope), status=200, mimetype='application/json')
         
     except Exception as e:
         print(f"[ERROR] {str(e)}")
@@ -204,18 +303,20 @@ def test_security():
 @app.route('/api/security/logs', methods=['GET'])
 def get_security_logs():
     """Get security event logs"""
+    with _state_lock:
+        nonce_snapshot = {device: highest for device, (highest, _) in nonce_store.items()}
     return jsonify({
-        "logs": security_logs[-50:],  # Last 50 events
+        "logs": list(islice(security_logs, max(0, len(security_logs) - 50), None)),  # Last 50 events
         "total_events": len(security_logs),
-        "nonce_store": nonce_store
+        "nonce_store": nonce_snapshot
     }), 200
 
 @app.route('/api/security/reset', methods=['POST'])
 def reset_security():
     """Reset security state (for testing)"""
-    global nonce_store, security_logs
-    nonce_store = {}
-    security_logs = []
+    with _state_lock:
+        nonce_store.clear()
+    security_logs.clear()
     return jsonify({"status": "reset", "message": "Security state cleared"}), 200
 
 if __name__ == '__main__':
@@ -225,6 +326,7 @@ if __name__ == '__main__':
     print(f"Security Enabled: {SECURITY_ENABLED}")
     print(f"PSK: {PSK.hex()}")
     print(f"Nonce Window: {NONCE_WINDOW}")
+    print(f"Debug Output: {DEBUG}")
     print("=" * 60)
     print("\nEndpoints:")
     print("  POST /api/security/test - Test secured messages")
@@ -234,4 +336,14 @@ if __name__ == '__main__':
     print("\nListening on http://0.0.0.0:8080")
     print("=" * 60)
     
-    app.run(host='0.0.0.0', port=8080, debug=True)
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve:
+        print("Serving with waitress (8 threads)")
+        serve(app, host='0.0.0.0', port=8080, threads=8)
+    else:
+        # Fallback: threaded Werkzeug server, no debugger/reloader overhead
+        app.run(host='0.0.0.0', port=8080, threaded=True, debug=False)
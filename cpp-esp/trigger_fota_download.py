@@ -8,10 +8,106 @@ import requests
 import json
 import time
 
-# Server configuration
-SERVER_URL = "http://localhost:5000"
+from fota_cache import make_session
+
+# Server configuration - the Flask cloud server (app.py) that serves the FOTA status/event routes
+SERVER_URL = "http://localhost:8080"
 DEVICE_ID = "EcoWatt001"
 FIRMWARE_VERSION = "1.0.3"
+MONITOR_TIMEOUT_SEC = 120
+
+# Shared keep-alive session for all status checks; transient gateway errors are retried
+_SESSION = make_session()
+
+def _fota_status():
+    """(manifest, this device's FOTA status) from one cloud status request, or None if unavailable"""
+    try:
+        response = _SESSION.get(f"{SERVER_URL}/api/cloud/fota/status", timeout=5)
+    except requests.exceptions.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    body = response.json()
+    return body.get('manifest'), body.get('device_status', {}).get(DEVICE_ID)
+
+def _print_monitor_status(start_time):
+    elapsed = int(time.time() - start_time)
+    print(f"   ⏱️  Monitoring for {elapsed}s - ESP32 should check for updates soon...")
+
+def _print_monitor_timeout():
+    print("\n   ⏰ Monitoring timeout reached (2 minutes)")
+    print("   💡 If no FOTA activity occurred, the ESP32 may already be on the latest version")
+
+def _stream_fota_activity(start_time):
+    """Block on the server's FOTA event stream until this device logs something.
+    
+    Returns False if the server has no event stream or it drops mid-stream
+    (caller should poll instead).
+    """
+    try:
+        response = _SESSION.get(f"{SERVER_URL}/api/cloud/fota/events", params={"device_id": DEVICE_ID},
+                                stream=True, timeout=(5, 30))
+    except requests.exceptions.RequestException:
+        return False
+    
+    with response:
+        if response.status_code != 200:
+            return False
+        try:
+            # chunk_size=None hands over each event as soon as it arrives
+            for line in response.iter_lines(chunk_size=None):
+                if not line:
+                    continue  # Blank line ending an event
+                if line.startswith(b"data:"):
+                    event = json.loads(line[5:])
+                    print(f"\n   📥 FOTA activity from {DEVICE_ID}: {event.get('event_type')} - {event.get('details')}")
+                    return True
+                # Anything else is the server's greeting or periodic keep-alive comment
+                if time.time() - start_time > MONITOR_TIMEOUT_SEC:
+                    _print_monitor_timeout()
+                    return True
+                _print_monitor_status(start_time)
+        except requests.exceptions.RequestException:
+            return False  # Stream dropped (read timeout, reset) - fall back to polling
+    return False  # Server closed the stream early
+
+def _poll_fota_activity(start_time):
+    """Poll the cloud FOTA status until this device reports something or the timeout passes.
+    
+    While the status route is unreachable, checks drop back to the plain 2 s cadence.
+    """
+    last_status_time = 0
+    last_manifest, baseline = _fota_status() or (None, None)
+    delay = 0.1  # Poll quickly at first, backing off to once a second
+    
+    while True:
+        current_time = time.time()
+        
+        # Print status every 10 seconds
+        if current_time - last_status_time > 10:
+            _print_monitor_status(start_time)
+            last_status_time = current_time
+        
+        # Check if we should stop monitoring (after 2 minutes)
+        if current_time - start_time > MONITOR_TIMEOUT_SEC:
+            _print_monitor_timeout()
+            return
+        
+        snapshot = _fota_status()
+        if snapshot is None:
+            time.sleep(2)  # No status to watch - don't hammer the server
+            continue
+        
+        manifest, status = snapshot
+        if manifest != last_manifest:
+            print(f"   📦 Manifest changed: version {(manifest or {}).get('version', 'none')}")
+            last_manifest = manifest
+        if status is not None and status != baseline:
+            print(f"\n   📥 FOTA activity from {DEVICE_ID}: {json.dumps(status)}")
+            return
+        
+        time.sleep(delay)
+        delay = min(delay * 1.5, 1.0)
 
 def trigger_fota_download():
     print(f"🚀 Triggering FOTA download for {DEVICE_ID}")
@@ -21,7 +117,7 @@ def trigger_fota_download():
     try:
         # Step 1: Check current server status
         print("1️⃣ Checking server status...")
-        response = requests.get(f"{SERVER_URL}/api/inverter/fota/manifest")
+        response = _SESSION.get(f"{SERVER_URL}/api/inverter/fota/manifest")
         if response.status_code == 200:
             print("   ✅ Server is accessible")
             current_manifest = response.json()
@@ -32,7 +128,7 @@ def trigger_fota_download():
         
         # Step 2: Upload firmware if needed
         print("\n2️⃣ Checking firmware availability...")
-        firmware_list_response = requests.get(f"{SERVER_URL}/firmware/list")
+        firmware_list_response = _SESSION.get(f"{SERVER_URL}/firmware/list")
         if firmware_list_response.status_code == 200:
             firmware_list = firmware_list_response.json()
             target_firmware = None
@@ -58,26 +154,10 @@ def trigger_fota_download():
         print("   🔄 Watch the server logs below for FOTA activity...")
         print("")
         
-        # Monitor for FOTA activity
+        # Monitor for FOTA activity: wait on the server's event stream, or poll if it has none
         start_time = time.time()
-        last_status_time = 0
-        
-        while True:
-            current_time = time.time()
-            
-            # Print status every 10 seconds
-            if current_time - last_status_time > 10:
-                elapsed = int(current_time - start_time)
-                print(f"   ⏱️  Monitoring for {elapsed}s - ESP32 should check for updates soon...")
-                last_status_time = current_time
-            
-            # Check if we should stop monitoring (after 2 minutes)
-            if current_time - start_time > 120:
-                print("\n   ⏰ Monitoring timeout reached (2 minutes)")
-                print("   💡 If no FOTA activity occurred, the ESP32 may already be on the latest version")
-                break
-            
-            time.sleep(2)
+        if not _stream_fota_activity(start_time):
+            _poll_fota_activity(start_time)
             
     except KeyboardInterrupt:
         print("\n\n⏹️  Monitoring interrupted by user")
@@ -7,7 +7,30 @@ import requests
 import json
 import time
 import hashlib
-import base64
+import struct
+
+from fota_cache import make_session
+
+# numpy is optional; without it the fill pattern is packed with struct
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Shared keep-alive session; transient gateway errors are retried
+_SESSION = make_session()
+
+_PATTERN_MULTIPLIER = 0x12345678
+
+def _fill_code_pattern(buf, start, end):
+    """Write little-endian uint32 words (i * 0x12345678) & 0xFFFFFFFF for i in range(start, end, 4) into buf"""
+    if np is not None:
+        # uint32 multiply wraps mod 2**32 and lands directly in buf through a view
+        words = np.frombuffer(buf, dtype=np.uint8)[start:end].view('<u4')
+        np.multiply(np.arange(start, end, 4, dtype='<u4'), np.uint32(_PATTERN_MULTIPLIER), out=words)
+        return
+    words = [(i * _PATTERN_MULTIPLIER) & 0xFFFFFFFF for i in range(start, end, 4)]
+    struct.pack_into('<%dI' % len(words), buf, start, *words)
 
 def create_test_firmware(version="1.0.4", size=40960):
     """Create a test firmware binary for demo purposes (40KB = 10 chunks)."""
@@ -20,12 +43,10 @@ def create_test_firmware(version="1.0.4", size=40960):
     firmware_data[0:4] = b'\xe9\x00\x00\x20'  # ESP32 app magic
     firmware_data[4:8] = version.encode('utf-8')[:4].ljust(4, b'\x00')
     
-    # Fill with realistic firmware-like data
-    for i in range(32, size, 4):
-        # Create some pattern that looks like compiled code
-        value = (i * 0x12345678) & 0xFFFFFFFF
-        if i + 4 <= size:
-            firmware_data[i:i+4] = value.to_bytes(4, 'little')
+    # Fill with realistic firmware-like data: a pattern that looks like compiled code,
+    # whole 4-byte words only (images of 32 bytes or less have no room for it)
+    if size > 32:
+        _fill_code_pattern(firmware_data, 32, 32 + (size - 32) // 4 * 4)
     
     # Add version string at the end
     version_bytes = f"EcoWatt-{version}-demo".encode('utf-8')
@@ -43,20 +64,18 @@ def upload_firmware(cloud_url="http://localhost:8080"):
     fw_hash = hashlib.sha256(firmware_data).hexdigest()
     print(f"Firmware hash: {fw_hash}")
     
-    # Encode as base64
-    firmware_b64 = base64.b64encode(firmware_data).decode('ascii')
-    
-    payload = {
+    # Multipart upload: metadata as form fields, firmware as raw bytes (no base64)
+    fields = {
         "version": "1.0.4",
-        "size": len(firmware_data),
+        "size": str(len(firmware_data)),
         "hash": fw_hash,
-        "chunk_size": 1024,
-        "firmware_data": firmware_b64
+        "chunk_size": "1024",
     }
+    files = {"firmware": ("firmware.bin", firmware_data, "application/octet-stream")}
     
     try:
-        response = requests.post(f"{cloud_url}/api/cloud/fota/upload", 
-                               json=payload, timeout=30)
+        response = _SESSION.post(f"{cloud_url}/api/cloud/fota/upload", 
+                               data=fields, files=files, timeout=30)
         response.raise_for_status()
         result = response.json()
         
@@ -5,13 +5,13 @@ The device will download all chunks but FAIL verification, demonstrating safe ro
 """
 
 import requests
-import hashlib
-import base64
 import os
 
-# Configuration
-CLOUD_SERVER = "http://localhost:8080"
-FIRMWARE_PATH = ".pio/build/esp32dev/firmware.bin"
+# Configuration shared with the working upload script
+from fota_cache import CLOUD_SERVER, FIRMWARE_PATH, UPLOAD_CHUNK_SIZE, make_session
+
+# Shared keep-alive session; transient gateway errors are retried
+_SESSION = make_session()
 
 def upload_corrupted_firmware(version: str):
     """Upload real firmware but with intentionally wrong hash to trigger verification failure."""
@@ -21,24 +21,23 @@ def upload_corrupted_firmware(version: str):
         print("   Run 'pio run' first to compile the firmware")
         return False
     
-    # Read the actual firmware
-    with open(FIRMWARE_PATH, "rb") as f:
-        firmware_data = f.read()
-    
-    firmware_size = len(firmware_data)
+    # The upload below streams the actual firmware from disk
+    firmware_size = os.path.getsize(FIRMWARE_PATH)
     
-    # Calculate the REAL hash
-    real_hash = hashlib.sha256(firmware_data).hexdigest()
-    
-    # Create a FAKE/CORRUPTED hash (flip some characters)
-    corrupted_hash = "deadbeef" + real_hash[8:56] + "cafebabe"
+    # Create a FAKE/CORRUPTED hash - the real one is never sent, so it isn't computed
+    # 32 raw digest bytes with sentinel ends, hex-encoded once for the request
+    corrupted = bytearray(32)
+    corrupted[:4] = b"\xde\xad\xbe\xef"
+    corrupted[4:28] = os.urandom(24)
+    corrupted[28:] = b"\xca\xfe\xba\xbe"
+    corrupted_hash = corrupted.hex()
     
     print(f"=" * 60)
     print(f"  FOTA FAILURE + ROLLBACK DEMO")
     print(f"=" * 60)
     print(f"  Version:        {version}")
     print(f"  Firmware Size:  {firmware_size:,} bytes")
-    print(f"  Real SHA256:    {real_hash[:32]}...")
+    print(f"  Real SHA256:    (not computed)")
     print(f"  FAKE SHA256:    {corrupted_hash[:32]}...")
     print(f"=" * 60)
     print()
@@ -46,31 +45,31 @@ def upload_corrupted_firmware(version: str):
     print("⚠️  Device will download but FAIL verification!")
     print()
     
-    # Encode firmware as base64 (same as upload_real_firmware.py)
-    firmware_b64 = base64.b64encode(firmware_data).decode('ascii')
-    
     # Use 8KB chunks like the working version
-    chunk_size = 8192
+    chunk_size = UPLOAD_CHUNK_SIZE
     num_chunks = (firmware_size + chunk_size - 1) // chunk_size
     
     print(f"📦 Uploading to server ({num_chunks} chunks)...")
     
-    # Use the same endpoint format as upload_real_firmware.py
-    payload = {
+    # Same streamed format as upload_real_firmware.py: query parameters + raw firmware body
+    params = {
         "version": version,
-        "size": firmware_size,
+        "size": str(firmware_size),
         "hash": corrupted_hash,  # ← INTENTIONALLY WRONG!
-        "chunk_size": chunk_size,
-        "firmware_data": firmware_b64,
-        "skip_validation": True  # Skip server-side validation for rollback test
+        "chunk_size": str(chunk_size),
+        "skip_validation": "true"  # Skip server-side validation for rollback test
     }
+    headers = {"Content-Type": "application/octet-stream", "Content-Length": str(firmware_size)}
     
     try:
-        response = requests.post(
-            f"{CLOUD_SERVER}/api/cloud/fota/upload",
-            json=payload,
-            timeout=60
-        )
+        with open(FIRMWARE_PATH, "rb") as f:
+            response = _SESSION.post(
+                f"{CLOUD_SERVER}/api/cloud/fota/upload",
+                params=params,
+                data=f,
+                headers=headers,
+                timeout=60
+            )
         
         if response.status_code != 200:
             print(f"❌ Failed to upload: {response.text}")
@@ -2,65 +2,113 @@
 """
 Upload REAL Firmware for FOTA Demo
 Uses the actual compiled firmware.bin from PlatformIO build
+
+The image goes up as a single streamed request and the server splits it
+into chunks, so there are no per-chunk round trips to parallelise.
 """
 
-import requests
 import json
-import hashlib
-import base64
+import http.client
 import os
+import zlib
+from urllib.parse import urlencode, urlsplit
+
+from fota_cache import CLOUD_SERVER, FIRMWARE_PATH, UPLOAD_CHUNK_SIZE, sha256_file
+
+def _deflate_file(path, block_size=65536):
+    """zlib-compressed contents of a file, compressed block by block"""
+    compressor = zlib.compressobj(6)
+    parts = []
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            parts.append(compressor.compress(block))
+    parts.append(compressor.flush())
+    return b"".join(parts)
 
-def upload_real_firmware(cloud_url="http://localhost:8080", version="1.0.5"):
-    """Upload the real compiled firmware for FOTA."""
+def _sendfile_post(url, params, path, size, timeout=60, data=None):
+    """POST a file as the raw request body with socket.sendfile (page cache -> socket, no
+    userspace copy on Linux/macOS). If data is given it is sent instead of the file.
+    Returns (status, response body bytes)."""
+    parts = urlsplit(url)
+    if parts.scheme == "https":
+        # TLS sockets fall back to a userspace send loop, but the body is still streamed
+        conn = http.client.HTTPSConnection(parts.hostname, parts.port or 443, timeout=timeout)
+    elif parts.scheme == "http":
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+    else:
+        raise ValueError(f"Unsupported URL scheme: {url}")
+    try:
+        conn.putrequest("POST", f"{parts.path}?{urlencode(params)}")
+        conn.putheader("Content-Type", "application/octet-stream")
+        conn.putheader("Content-Length", str(size))
+        conn.endheaders()
+        if data is not None:
+            conn.send(data)
+        else:
+            with open(path, "rb") as f:
+                conn.sock.sendfile(f)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+def upload_real_firmware(cloud_url=CLOUD_SERVER, version="1.0.5", compress=False):
+    """Upload the real compiled firmware for FOTA.
+
+    compress=True sends the image zlib-compressed (real ESP32 builds shrink ~2x);
+    worth it on slow links, but on localhost compressing costs more than it saves.
+    """
     
-    firmware_path = ".pio/build/esp32dev/firmware.bin"
+    firmware_path = FIRMWARE_PATH
     
     if not os.path.exists(firmware_path):
         print(f"❌ Firmware not found: {firmware_path}")
         print("   Run 'pio run' to build the firmware first")
         return False
     
-    # Read real firmware
-    with open(firmware_path, "rb") as f:
-        firmware_data = f.read()
+    # Hash real firmware; the upload below streams it from disk
+    fw_hash = sha256_file(firmware_path)
     
-    size = len(firmware_data)
+    size = os.path.getsize(firmware_path)
     print(f"📦 Real Firmware Upload")
     print(f"=" * 60)
     print(f"   File: {firmware_path}")
     print(f"   Size: {size:,} bytes ({size/1024:.1f} KB)")
     print(f"   Version: {version}")
     
-    # Calculate SHA-256 hash
-    fw_hash = hashlib.sha256(firmware_data).hexdigest()
     print(f"   SHA256: {fw_hash[:32]}...")
     
-    # Encode as base64
-    firmware_b64 = base64.b64encode(firmware_data).decode('ascii')
-    
-    # Use 8KB chunks - fits in ESP32 memory, faster than 4KB
-    # 8KB binary = ~11KB base64 in JSON = should fit in ESP32 RAM
     # 1MB / 8KB = ~132 chunks @ 0.5s each = ~66 seconds
-    chunk_size = 8192  # 8KB per chunk
+    chunk_size = UPLOAD_CHUNK_SIZE
     num_chunks = (size + chunk_size - 1) // chunk_size
     print(f"   Chunks: {num_chunks} (each {chunk_size/1024:.1f} KB)")
     print(f"=" * 60)
     
-    payload = {
+    # Raw streamed upload: metadata as query parameters, firmware body read from disk
+    params = {
         "version": version,
-        "size": size,
+        "size": str(size),
         "hash": fw_hash,
-        "chunk_size": chunk_size,
-        "firmware_data": firmware_b64
+        "chunk_size": str(chunk_size),
     }
     
     print(f"\n⬆️  Uploading to {cloud_url}...")
     
     try:
-        response = requests.post(f"{cloud_url}/api/cloud/fota/upload", 
-                               json=payload, timeout=60)
-        response.raise_for_status()
-        result = response.json()
+        if compress:
+            # Size and hash above still describe the uncompressed image
+            data = _deflate_file(firmware_path)
+            params["compression"] = "zlib"
+            print(f"   Compressed: {len(data):,} bytes ({len(data) / size:.0%} of original)")
+            status, body = _sendfile_post(f"{cloud_url}/api/cloud/fota/upload", params,
+                                          firmware_path, len(data), data=data)
+        else:
+            # Zero-copy: the kernel sends firmware.bin straight from the page cache
+            status, body = _sendfile_post(f"{cloud_url}/api/cloud/fota/upload", params,
+                                          firmware_path, size)
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}")
+        result = json.loads(body)
         
         if result.get('status') == 'success':
             print(f"\n✅ Firmware uploaded successfully!")
@@ -78,5 +126,7 @@ def upload_real_firmware(cloud_url="http://localhost:8080", version="1.0.5"):
 
 if __name__ == '__main__':
     import sys
-    version = sys.argv[1] if len(sys.argv) > 1 else "1.0.5"
-    upload_real_firmware(version=version)
+    # Usage: upload_real_firmware.py [version] [--compress]
+    args = [a for a in sys.argv[1:] if a != "--compress"]
+    version = args[0] if args else "1.0.5"
+    upload_real_firmware(version=version, compress="--compress" in sys.argv[1:])